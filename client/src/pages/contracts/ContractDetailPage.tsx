@@ -3,7 +3,7 @@ import { useParams } from 'react-router-dom';
 import { useQuery } from '@tanstack/react-query';
 import { contracts } from '../../services/api';
 import Button from '../../components/ui/Button';
-import type { ContractDetail, ContractStatus, AITaskStatus, AITaskType } from '../../types/api';
+import type { ContractDetail, ContractStatus, AITaskStatus, AITaskType, VersionAIResults } from '../../types/api';
 import { ContractChat } from '../../components/ContractChat';
 import { UploadVersionModal } from '../../components/UploadVersionModal';
 
@@ -19,6 +19,19 @@ const ContractDetailPage = () => {
     enabled: !!id,
   });
 
+  const latestVersionId = contract
+    ? [...contract.versions].sort((a, b) => b.version_num - a.version_num)[0]?.id
+    : undefined;
+  const selectedTaskCompleted = !!latestVersionId && !!selectedAnalysis &&
+    contract?.ai_tasks[latestVersionId]?.[selectedAnalysis as AITaskType]?.status === 'Completed';
+
+  // Result payloads are loaded per version, only for the analysis being viewed
+  const { data: versionResults, isLoading: resultsLoading } = useQuery<VersionAIResults>({
+    queryKey: ['contract-results', id, latestVersionId, selectedAnalysis],
+    queryFn: () => contracts.getVersionResults(id!, latestVersionId!, [selectedAnalysis!]),
+    enabled: selectedTaskCompleted,
+  });
+
   // When contract data changes, check if we should show analysis
   useEffect(() => {
     if (contract) {
@@ -139,7 +152,7 @@ const ContractDetailPage = () => {
 
   // Function to render clause analysis
   const renderClauseAnalysis = (result: any) => {
-    const clauses = JSON.parse(result).clauses;
+    const clauses = result.clauses;
     return (
       <div className="space-y-4">
         {clauses.map((clause: any, index: number) => (
@@ -160,7 +173,7 @@ const ContractDetailPage = () => {
 
   // Function to render risk analysis
   const renderRiskAnalysis = (result: any) => {
-    const risks = JSON.parse(result).risks;
+    const risks = result.risks;
     return (
       <div className="space-y-4">
         {risks.map((risk: any, index: number) => (
@@ -220,7 +233,7 @@ const ContractDetailPage = () => {
     }
 
     const task = latestVersionTasks[selectedAnalysis as AITaskType];
-    if (!task || task.status !== 'Completed' || !task.result) {
+    if (!task || task.status !== 'Completed') {
       return (
         <div className="text-center py-8 text-ink-medium">
           Analysis {task?.status.toLowerCase() || 'pending'}...
@@ -228,13 +241,28 @@ const ContractDetailPage = () => {
       );
     }
 
-    const result = typeof task.result === 'string' ? JSON.parse(task.result) : task.result;
+    if (resultsLoading) {
+      return (
+        <div className="text-center py-8 text-ink-medium">
+          Loading analysis...
+        </div>
+      );
+    }
+
+    const result = versionResults?.results[selectedAnalysis as AITaskType]?.result;
+    if (!result) {
+      return (
+        <div className="text-center py-8 text-ink-medium">
+          No analysis results available.
+        </div>
+      );
+    }
 
     switch (selectedAnalysis) {
       case 'ClauseExtraction':
-        return renderClauseAnalysis(task.result);
+        return renderClauseAnalysis(result);
       case 'RiskAssessment':
-        return renderRiskAnalysis(task.result);
+        return renderRiskAnalysis(result);
       case 'Diff':
         return renderVersionComparison(result);
       default:
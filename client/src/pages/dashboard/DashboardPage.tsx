@@ -1,5 +1,5 @@
 import { useState, useMemo } from 'react';
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery } from '@tanstack/react-query';
 import { Link } from 'react-router-dom';
 import Button from '../../components/ui/Button';
 import { contracts } from '../../services/api';
@@ -16,24 +16,38 @@ type ContractStatusMap = Partial<Record<ContractStatus, Contract[]>>;
 const DashboardPage = () => {
   const [selectedStatus, setSelectedStatus] = useState<ContractStatus | null>(null);
 
-  // Fetch contracts
-  const { data: contractsData, isLoading } = useQuery({
+  // Fetch contracts one page at a time (filtered by status on the server)
+  const {
+    data: contractsData,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['contracts', selectedStatus],
-    queryFn: () => contracts.list(selectedStatus || undefined),
+    queryFn: ({ pageParam }) => contracts.list(selectedStatus || undefined, pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
   });
 
+  const loadedContracts = useMemo<Contract[]>(
+    () => contractsData?.pages.flatMap((page) => page.contracts) ?? [],
+    [contractsData]
+  );
+
+  // Tile totals cover all of the user's contracts, not just the loaded pages
+  const statusCounts = contractsData?.pages[0]?.status_counts ?? {};
+
   // Organize contracts by status
   const contractsByStatus = useMemo<ContractStatusMap>(() => {
-    if (!contractsData?.contracts) return {};
-    
-    return contractsData.contracts.reduce((acc: ContractStatusMap, contract) => {
+    return loadedContracts.reduce((acc: ContractStatusMap, contract) => {
       if (!acc[contract.status]) {
         acc[contract.status] = [];
       }
       acc[contract.status]?.push(contract);
       return acc;
     }, {});
-  }, [contractsData?.contracts]);
+  }, [loadedContracts]);
 
   const statusTiles: StatusTile[] = [
     { 
@@ -100,10 +114,9 @@ const DashboardPage = () => {
 
   // Get filtered contracts based on selected status
   const filteredContracts = useMemo(() => {
-    if (!contractsData?.contracts) return [];
-    if (!selectedStatus) return contractsData.contracts;
+    if (!selectedStatus) return loadedContracts;
     return contractsByStatus[selectedStatus] || [];
-  }, [selectedStatus, contractsData?.contracts, contractsByStatus]);
+  }, [selectedStatus, loadedContracts, contractsByStatus]);
 
   return (
     <div className="space-y-8 p-6">
@@ -128,7 +141,7 @@ const DashboardPage = () => {
               selectedStatus === tile.status ? 'ring-2 ring-coral-primary scale-105' : ''
             }`}
           >
-            <div className="text-3xl font-bold">{contractsByStatus[tile.status]?.length || 0}</div>
+            <div className="text-3xl font-bold">{statusCounts[tile.status] ?? contractsByStatus[tile.status]?.length ?? 0}</div>
             <div className="text-sm font-medium">{tile.title}</div>
             <div className="text-xs mt-1 opacity-75">{tile.description}</div>
           </button>
@@ -227,6 +240,15 @@ const DashboardPage = () => {
             )}
           </tbody>
         </table>
+        {hasNextPage && (
+          <button
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+            className="w-full py-3 text-sm font-medium text-ink-medium hover:text-ink-text transition-colors border-t border-ink-light/10"
+          >
+            {isFetchingNextPage ? 'Loading...' : 'Load more contracts'}
+          </button>
+        )}
       </div>
     </div>
   );
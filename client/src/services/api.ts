@@ -9,6 +9,7 @@ import type {
   Risk,
   DiffSummary,
   ChatResponse,
+  VersionAIResults,
 } from '../types/api';
 
 // Create axios instance
@@ -74,9 +75,24 @@ export const auth = {
 
 // Contracts API
 export const contracts = {
-  list: async (status?: string) => {
+  list: async (status?: string, cursor?: string | null, limit = 50) => {
     const response = await api.get<ContractsResponse>('/contracts/me', {
-      params: { status }
+      params: { status, cursor: cursor || undefined, limit }
+    });
+    return response.data;
+  },
+
+  getVersionResults: async (
+    id: string,
+    versionId: string,
+    types?: string[],
+    fields?: string[]
+  ): Promise<VersionAIResults> => {
+    const response = await api.get<VersionAIResults>(`/contracts/${id}/versions/${versionId}/ai-results`, {
+      params: {
+        types: types?.join(','),
+        fields: fields?.join(','),
+      }
     });
     return response.data;
   },
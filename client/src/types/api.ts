@@ -51,8 +51,22 @@ export interface Participant {
 
 export interface AITask {
   status: AITaskStatus;
-  result: any | null;
   updated_at: string;
+  duration_ms?: number | null;
+  error?: string | null;
+  result?: any | null; // only present when details are requested with include_results
+}
+
+export interface VersionAIResults {
+  contract_id: string;
+  version_id: string;
+  results: {
+    [taskType in AITaskType]?: {
+      status: AITaskStatus;
+      updated_at: string;
+      result: any | null;
+    };
+  };
 }
 
 export interface ContractDetail extends Contract {
@@ -67,6 +81,8 @@ export interface ContractDetail extends Contract {
 
 export interface ContractsResponse {
   contracts: Contract[];
+  next_cursor: string | null;
+  status_counts?: Partial<Record<ContractStatus, number>>; // first page only
 }
 
 // Comment Types
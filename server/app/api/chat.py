@@ -2,9 +2,14 @@
 API endpoints for contract chat functionality.
 """
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from typing import Dict
-from server.app.external_services.chat_service import ChatService
+from dataclasses import replace
+from server.app.external_services.service_registry import services
+from server.app.external_services.retrieval import RetrievalOptions
+from server.app.models.chat import ChatRequest
 from server.app.utils.auth import verify_jwt
+import json
 import logging
 
 # Configure logging
@@ -12,22 +17,31 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _retrieval_options(req: ChatRequest) -> RetrievalOptions:
+    overrides = {
+        "mode": req.retrieval_mode,
+        "top_k": req.top_k,
+        "candidate_pool": req.candidate_pool,
+        "rerank": req.rerank
+    }
+    return replace(RetrievalOptions(), **{key: value for key, value in overrides.items() if value is not None})
+
 @router.post("/contracts/{contract_id}/versions/{version_id}/chat")
 async def ask_question(
     contract_id: str,
     version_id: str,
-    question: Dict[str, str],
+    question: ChatRequest,
     user: dict = Depends(verify_jwt)
 ) -> Dict:
     """
     Ask a question about a specific contract version.
     """
     try:
-        chat_service = ChatService()
-        result = await chat_service.get_answer(
+        result = await services.chat_service.get_answer(
             contract_id=contract_id,
             version_id=version_id,
-            question=question["text"]
+            question=question.text,
+            options=_retrieval_options(question)
         )
         return result
     except Exception as e:
@@ -35,4 +49,33 @@ async def ask_question(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process your question. Please try again."
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/contracts/{contract_id}/versions/{version_id}/chat/stream")
+async def ask_question_stream(
+    contract_id: str,
+    version_id: str,
+    question: ChatRequest,
+    user: dict = Depends(verify_jwt)
+) -> StreamingResponse:
+    """
+    Ask a question and receive the answer as Server-Sent Events: a "citations" event
+    right after retrieval, "token" events as the answer is generated, then "done"
+    (or "error").
+    """
+    options = _retrieval_options(question)
+
+    async def event_stream():
+        async for event in services.chat_service.stream_answer(
+            contract_id=contract_id,
+            version_id=version_id,
+            question=question.text,
+            options=options
+        ):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
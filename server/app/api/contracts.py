@@ -1,17 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Request, UploadFile, File, Form, Body
+from fastapi import APIRouter, HTTPException, Depends, status, Request, UploadFile, File, Form, Body, Query
 from fastapi.encoders import jsonable_encoder
-from server.app.models.contracts import ContractCreate, ContractResponse, ContractVersionCreate, ContractVersionResponse, AssignParticipantsRequest, ParticipantResponse, ParticipantCreate
-from server.app.crud.contracts import create_contract, create_contract_version, upsert_participant, remove_participant
-from server.app.utils.auth import verify_jwt
-from server.app.tasks.clause_extraction_task import extract_clauses_from_contract
+from server.app.models.contracts import ContractCreate, ContractResponse, ContractVersionCreate, ContractVersionResponse, AssignParticipantsRequest, ParticipantResponse, ParticipantCreate, BulkImportRequest, ContractStatus
+from server.app.crud.contracts import (
+    create_contract, upsert_participant, remove_participant, run_query,
+    get_latest_version, get_versions_by_id, get_contract_detail,
+    list_user_contracts_page, get_user_status_counts, get_version_results,
+    create_contract_version_async, upload_contract_file, get_contract_status
+)
+from server.app.core.storage_upload import PdfStreamInspector, InvalidPdfError, UploadTooLargeError, UPLOAD_CHUNK_BYTES
+from server.app.utils.auth import verify_jwt, require_admin
+from server.app.utils.contract_access import ContractAccess, get_contract_access
+from server.app.utils.serialization import project_fields
 from server.app.tasks.risk_extraction_task import extract_risks_from_contract
 from server.app.tasks.diff_extraction_task import extract_diff_from_contract
-from server.app.tasks.embedding_task import generate_embeddings_for_contract
+from server.app.tasks.workflow import start_version_workflow
+from server.app.tasks.bulk_import_task import bulk_import_contracts, set_job_owner, get_job_owner
+from celery.result import AsyncResult
 from typing import Any, Optional, List, Dict
 from enum import Enum
 from datetime import date
 from ..core.supabase_client import supabase
 import os
+import base64
+import json
+import hashlib
 from uuid import UUID
 import uuid
 import logging
@@ -22,6 +34,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Server-side directory that bulk imports may read from; bulk import is disabled when unset
+BULK_IMPORT_ROOT = os.environ.get("BULK_IMPORT_ROOT")
+
 class ContractResponse(BaseModel):
     id: str
     title: str
@@ -86,80 +101,62 @@ def create_contract_endpoint(
 async def upload_contract_version(
     id: UUID, # contract id
     file: UploadFile = File(...),
-    user: dict = Depends(verify_jwt)
+    access: ContractAccess = Depends(get_contract_access)
 ):
     logger.info(f"Starting contract version upload for contract {id}")
     
     # 1. Check user is Contract Manager for this contract (created_by == user["sub"])
-    contract = supabase.table("contracts").select("created_by").eq("id", str(id)).single().execute()
-    if not contract.data or contract.data["created_by"] != user["sub"]:
-        raise HTTPException(status_code=403, detail="Only the Contract Manager can upload versions.")
-
-    # 2. Determine next version number
-    versions_resp = supabase.table("contract_versions").select("version_num").eq("contract_id", str(id)).order("version_num", desc=True).limit(1).execute()
-    if versions_resp.data and len(versions_resp.data) > 0:
-        next_version = versions_resp.data[0]["version_num"] + 1
-    else:
-        next_version = 1
-
-    # 3. Upload file to Supabase Storage
-    contents = await file.read()
+    access.require_manager("Only the Contract Manager can upload versions.")
+
+    # 2. The latest version is the new version's predecessor
+    latest_version = await get_latest_version(str(id))
+    next_version = latest_version["version_num"] + 1 if latest_version else 1
+
+    # 3. Stream the file to Supabase Storage in chunks, hashing and counting pages as it goes
     file_path = f"{id}/v{next_version}.pdf"
-    
+    inspector = PdfStreamInspector()
+
+    async def chunks():
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                return
+            inspector.feed(chunk)
+            yield chunk
+
     try:
-        storage_resp = supabase.storage.from_("contracts").upload(
-            path=file_path,
-            file=contents,
-            file_options={"content-type": file.content_type or "application/pdf"}
-        )
-        if hasattr(storage_resp, "error") and storage_resp.error:
-            logger.error(f"Storage upload failed: {storage_resp.error}")
-            raise HTTPException(status_code=500, detail=f"File upload failed: {storage_resp.error}")
+        file_url = await upload_contract_file(file_path, chunks(), file.content_type or "application/pdf")
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except InvalidPdfError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Storage upload exception: {str(e)}")
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
-
-    file_url = supabase.storage.from_("contracts").get_public_url(file_path)
+    logger.info(f"Uploaded {file_path}: {inspector.size} bytes, {inspector.page_count} pages, sha256 {inspector.sha256}")
 
     # 4. Insert row in contract_versions
     try:
-        version = create_contract_version(str(id), next_version, file_url, status="Draft")
-        
-        # 5. Trigger AI tasks
-        # Generate embeddings
-        generate_embeddings_for_contract.delay(
-            contract_id=str(id),
-            version_id=version["id"],
-            file_url=file_url
-        )
-        
-        # Extract clauses
-        extract_clauses_from_contract.delay(
-            contract_id=str(id),
-            version_id=version["id"],
-            file_url=file_url
+        version = await create_contract_version_async(
+            str(id), next_version, file_url, status="Draft",
+            file_metadata={
+                "file_sha256": inspector.sha256,
+                "file_size": inspector.size,
+                "page_count": inspector.page_count
+            }
         )
-        
-        # Extract risks
-        extract_risks_from_contract.delay(
+
+        # 5. Start the AI workflow: one text extraction, then the AI stages in parallel
+        prev_version_id = latest_version["id"] if latest_version else None
+        prev_file_url = latest_version["file_url"] if latest_version else None
+        await run_query(lambda: start_version_workflow(
             contract_id=str(id),
             version_id=version["id"],
-            file_url=file_url
-        )
-        
-        # Generate diff if there is a previous version
-        if next_version > 1:
-            prev_version_resp = supabase.table("contract_versions").select("id, file_url").eq("contract_id", str(id)).eq("version_num", next_version - 1).single().execute()
-            if prev_version_resp.data:
-                prev_file_url = prev_version_resp.data["file_url"]
-                extract_diff_from_contract.delay(
-                    contract_id=str(id),
-                    version_id=version["id"],
-                    prev_file_url=prev_file_url,
-                    curr_file_url=file_url
-                )
-            else:
-                logger.error(f"No previous version found for contract {id} at version_num {next_version - 1}. Diff extraction skipped.")
+            file_url=file_url,
+            prev_version_id=prev_version_id,
+            prev_file_url=prev_file_url,
+            lane="interactive"
+        ))
         return ContractVersionResponse(**version)
     except Exception as e:
         logger.error(f"Version creation failed: {str(e)}")
@@ -169,19 +166,16 @@ async def upload_contract_version(
 def assign_participants(
     id: UUID,
     req: AssignParticipantsRequest = Body(...),
-    user: dict = Depends(verify_jwt)
+    access: ContractAccess = Depends(get_contract_access)
 ):
-    # 0. Block edits if contract is signed
-    contract_status = supabase.table("contracts").select("status").eq("id", str(id)).single().execute().data["status"]
-    if contract_status == "Signed":
+    # 0. Block edits if contract is signed (read fresh: the access context may be cached)
+    if get_contract_status(str(id)) == "Signed":
         raise HTTPException(status_code=400, detail="Cannot edit participants after contract is signed.")
     # 1. Check user is CM for this contract
-    contract = supabase.table("contracts").select("created_by").eq("id", str(id)).single().execute()
-    if not contract.data or contract.data["created_by"] != user["sub"]:
-        raise HTTPException(status_code=403, detail="Only the Contract Manager can assign participants.")
+    access.require_manager("Only the Contract Manager can assign participants.")
 
     # 2. Get CM user_id (cannot be removed/changed)
-    cm_user_id = contract.data["created_by"]
+    cm_user_id = access.created_by
 
     # 3. Validate input: signing_order for AS, no duplicate AS signing_order, no signing_order for CO
     as_orders = set()
@@ -225,25 +219,19 @@ def assign_participants(
 def delete_participant(
     id: UUID,
     user_id: UUID,
-    user: dict = Depends(verify_jwt)
+    access: ContractAccess = Depends(get_contract_access)
 ):
-    # Find the contract first and check if it exists
-    contract_res = supabase.table("contracts").select("created_by, status").eq("id", str(id)).single().execute()
-    if not contract_res.data:
-        raise HTTPException(status_code=404, detail="Contract not found.")
-    
-    contract = contract_res.data
+    # Access to the contract is checked by get_contract_access (403/404)
 
-    # 0. Block deletes if contract is signed
-    if contract["status"] == "Signed":
+    # 0. Block deletes if contract is signed (read fresh: the access context may be cached)
+    if get_contract_status(str(id)) == "Signed":
         raise HTTPException(status_code=400, detail="Cannot delete participants after contract is signed.")
 
     # 1. Check user is CM for this contract
-    if contract["created_by"] != user["sub"]:
-        raise HTTPException(status_code=403, detail="Only the Contract Manager can remove participants.")
+    access.require_manager("Only the Contract Manager can remove participants.")
 
     # 2. Prevent removing CM
-    if str(user_id) == str(contract["created_by"]):
+    if str(user_id) == str(access.created_by):
         raise HTTPException(status_code=400, detail="Cannot remove the Contract Manager from participants.")
 
     # 3. *** NEW CHECK ***: Verify the participant exists on this contract before deleting.
@@ -261,7 +249,7 @@ async def trigger_risk_assessment(contract_id: str, version_id: str, file_url: s
     """
     try:
         # Enqueue the Celery task (runs in background)
-        extract_risks_from_contract.delay(contract_id, version_id, file_url)
+        await run_query(lambda: extract_risks_from_contract.delay(contract_id, version_id, file_url))
         return {"message": "Risk assessment task triggered", "contract_id": contract_id, "version_id": version_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to trigger risk assessment: {str(e)}")
@@ -276,112 +264,210 @@ async def trigger_diff(
     Manually trigger diff extraction between two contract versions.
     """
     try:
-        # Fetch file URLs for both versions
-        curr_version = supabase.table("contract_versions").select("file_url").eq("id", current_version_id).single().execute()
-        prev_version = supabase.table("contract_versions").select("file_url").eq("id", previous_version_id).single().execute()
-        if not curr_version.data or not prev_version.data:
+        # Fetch file URLs for both versions in one query
+        versions = await get_versions_by_id([current_version_id, previous_version_id])
+        if current_version_id not in versions or previous_version_id not in versions:
             raise HTTPException(status_code=404, detail="One or both contract versions not found.")
-        curr_file_url = curr_version.data["file_url"]
-        prev_file_url = prev_version.data["file_url"]
+        curr_file_url = versions[current_version_id]["file_url"]
+        prev_file_url = versions[previous_version_id]["file_url"]
         # Enqueue the Celery task
-        extract_diff_from_contract.delay(contract_id, current_version_id, prev_file_url, curr_file_url)
+        await run_query(lambda: extract_diff_from_contract.delay(
+            contract_id, current_version_id, prev_file_url, curr_file_url, prev_version_id=previous_version_id
+        ))
         return {"message": "Diff extraction task triggered", "contract_id": contract_id, "current_version_id": current_version_id, "previous_version_id": previous_version_id}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to trigger diff extraction: {str(e)}")
 
-@router.get("/contracts/me")
-async def get_user_contracts(user=Depends(verify_jwt)):
+def _resolve_import_path(relative_path: str) -> str:
+    """Resolves a path under BULK_IMPORT_ROOT, rejecting anything outside it."""
+    root = os.path.realpath(BULK_IMPORT_ROOT)
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(status_code=400, detail="Import path must be inside the bulk import root.")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Import path not found: {relative_path}")
+    return path
+
+@router.post("/contracts/bulk-import", status_code=status.HTTP_202_ACCEPTED)
+async def start_bulk_import(req: BulkImportRequest, user: dict = Depends(require_admin)):
+    """
+    Starts a resumable bulk import of a server-side directory or CSV manifest of PDFs.
+    Admin only; owner_id becomes the Contract Manager of every imported contract. Posting
+    the same source for the same owner again resumes from its checkpoint.
+    """
+    if not BULK_IMPORT_ROOT:
+        raise HTTPException(status_code=403, detail="Bulk import is not enabled on this server.")
+    if bool(req.source_dir) == bool(req.manifest_path):
+        raise HTTPException(status_code=400, detail="Provide exactly one of source_dir or manifest_path.")
+    source = _resolve_import_path(req.source_dir or req.manifest_path)
+    checkpoint_dir = os.path.join(os.path.realpath(BULK_IMPORT_ROOT), ".checkpoints")
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    checkpoint_name = hashlib.sha256(f"{req.owner_id}:{source}".encode("utf-8")).hexdigest()[:16]
+    job_id = str(uuid.uuid4())
+    await run_query(lambda: set_job_owner(job_id, user["sub"]))
+    await run_query(lambda: bulk_import_contracts.apply_async(task_id=job_id, kwargs={
+        "created_by": str(req.owner_id),
+        "checkpoint_path": os.path.join(checkpoint_dir, f"{checkpoint_name}.json"),
+        "source_dir": source if req.source_dir else None,
+        "manifest_path": source if req.manifest_path else None,
+        "contract_status": req.contract_status.value
+    }))
+    return {"job_id": job_id, "status": "queued"}
+
+@router.get("/contracts/bulk-import/{job_id}")
+async def get_bulk_import_status(job_id: str, user: dict = Depends(require_admin)):
+    """
+    Returns the state and throughput (docs/sec, pages/sec) of a bulk import job.
+    Jobs started by other users are reported as not found.
+    """
+    if await run_query(lambda: get_job_owner(job_id)) != user["sub"]:
+        raise HTTPException(status_code=404, detail="Bulk import job not found.")
+
+    def _job_state():
+        # Each AsyncResult attribute read is a result backend round trip
+        job = AsyncResult(job_id, app=bulk_import_contracts.app)
+        return job.state, job.info
+
+    state, info = await run_query(_job_state)
+    if state == "FAILURE":
+        return {"job_id": job_id, "status": state, "error": str(info)}
+    return {"job_id": job_id, "status": state, "progress": info if isinstance(info, dict) else None}
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps([row["updated_at"], row["id"]]).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> tuple:
     try:
-        # Get all contracts where the user is a participant
-        response = supabase.from_('contract_participants').select(
-            """
-            contract_id,
-            role,
-            contracts!inner (
-                id,
-                title,
-                status,
-                expiry_date,
-                created_by,
-                created_at,
-                updated_at
-            )
-            """
-        ).eq('user_id', user['sub']).execute()
+        updated_at, contract_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(updated_at), str(UUID(contract_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
 
-        if hasattr(response, 'error') and response.error:
-            raise HTTPException(status_code=400, detail=str(response.error))
+@router.get("/contracts/me")
+async def get_user_contracts(
+    user=Depends(verify_jwt),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[ContractStatus] = None,
+    role: Optional[str] = Query(None, pattern="^(CM|AS|CO)$"),
+    q: Optional[str] = Query(None, max_length=200)
+):
+    """
+    Lists the user's contracts, most recently updated first, one page at a time.
+    Pass next_cursor back as cursor for the next page. The first page also carries
+    per-status totals across all of the user's contracts.
+    """
+    try:
+        # Get one page of contracts where the user is a participant
+        page_cursor = _decode_cursor(cursor) if cursor else None
+        rows = await list_user_contracts_page(
+            user['sub'],
+            limit=limit,
+            cursor=page_cursor,
+            status=status.value if status else None,
+            role=role,
+            search=q
+        )
 
         # Transform the response to match our schema
-        contracts = []
-        for item in response.data:
-            contract = item['contracts']
-            contracts.append(ContractResponse(
-                id=contract['id'],
-                title=contract['title'],
-                status=contract['status'],
-                expiry_date=contract['expiry_date'],
-                created_by=contract['created_by'],
-                created_at=contract['created_at'],
-                updated_at=contract['updated_at'],
-                role=item['role']
-            ))
-
-        return {"contracts": contracts}
+        contracts = [ContractResponse(**row) for row in rows[:limit]]
+        response = {
+            "contracts": contracts,
+            "next_cursor": _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        }
+        if page_cursor is None:
+            response["status_counts"] = await get_user_status_counts(user['sub'])
+        return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/contracts/{id}/versions/{version_id}/ai-results")
+async def get_version_ai_results(
+    id: UUID,
+    version_id: UUID,
+    types: Optional[str] = Query(None, description="Comma-separated task types, e.g. ClauseExtraction,RiskAssessment"),
+    fields: Optional[str] = Query(None, description="Comma-separated dotted fields to keep, e.g. clauses.type,clauses.page"),
+    access: ContractAccess = Depends(get_contract_access)
+) -> Dict[str, Any]:
+    """
+    Returns the AI task results of one contract version, optionally limited to some task
+    types and projected to the requested fields.
+    """
+    access.require_participant()
+    task_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    field_paths = [f.strip() for f in fields.split(",") if f.strip()] if fields else []
+    try:
+        tasks = await get_version_results(str(id), str(version_id), task_types)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    results = {}
+    for task in tasks:
+        result = task["result"]
+        # Clause and risk results are stored as JSON strings
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except ValueError:
+                pass
+        results[task["type"]] = {
+            "status": task["status"],
+            "updated_at": task["updated_at"],
+            "result": project_fields(result, field_paths) if result is not None else None
+        }
+    return {"contract_id": str(id), "version_id": str(version_id), "results": results}
+
 @router.get("/contracts/{id}", response_model=ContractDetailResponse)
 async def get_contract_details(
     id: UUID,
-    user: dict = Depends(verify_jwt)
+    include_results: bool = Query(False, description="Inline every AI task result (large); prefer the ai-results endpoint"),
+    access: ContractAccess = Depends(get_contract_access)
 ) -> Any:
+    """
+    Returns the contract with its versions, participants and per-version AI task status
+    summaries. Results are fetched per version from /contracts/{id}/versions/{version_id}/ai-results.
+    """
     try:
-        # 1. Check if user has access to this contract
-        participant = supabase.table("contract_participants").select("role").eq("contract_id", str(id)).eq("user_id", user["sub"]).single().execute()
-        if not participant.data:
-            raise HTTPException(status_code=403, detail="You don't have access to this contract")
-        
-        user_role = participant.data["role"]
-
-        # 2. Get contract basic info
-        contract = supabase.table("contracts").select("*").eq("id", str(id)).single().execute()
-        if not contract.data:
-            raise HTTPException(status_code=404, detail="Contract not found")
-
-        # 3. Get all versions
-        versions = supabase.table("contract_versions").select("*").eq("contract_id", str(id)).order("version_num").execute()
-
-        # 4. Get all participants with user details
-        participants = supabase.table("contract_participants").select("*, users!inner(email)").eq("contract_id", str(id)).execute()
+        # 1-2. Check if user has access to this contract (contract and role come from the access context)
+        access.require_participant()
 
-        # 5. Get all AI tasks
-        ai_tasks = supabase.table("ai_tasks").select("*").eq("contract_id", str(id)).execute()
+        # 3-5. Versions, participants and AI tasks, fetched concurrently
+        detail = await get_contract_detail(str(id), include_results=include_results)
 
         # 6. Organize AI tasks by type and version
         organized_ai_tasks = {}
-        for task in ai_tasks.data or []:
+        for task in detail["ai_tasks"]:
             version_id = task["version_id"]
             task_type = task["type"]
             if version_id not in organized_ai_tasks:
                 organized_ai_tasks[version_id] = {}
             organized_ai_tasks[version_id][task_type] = {
                 "status": task["status"],
-                "result": task["result"],
-                "updated_at": task["updated_at"]
+                "updated_at": task["updated_at"],
+                "duration_ms": task.get("duration_ms"),
+                "error": task.get("error")
             }
+            if include_results:
+                organized_ai_tasks[version_id][task_type]["result"] = task["result"]
 
         # 7. Construct response
         response = {
-            **contract.data,
-            "role": user_role,
-            "versions": versions.data or [],
-            "participants": participants.data or [],
+            # The cached access context only decides access; the response shows the current row
+            **(detail["contract"] or access.contract),
+            "role": access.role,
+            "versions": detail["versions"],
+            "participants": detail["participants"],
             "ai_tasks": organized_ai_tasks
         }
 
         return ContractDetailResponse(**response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""
+API endpoints exposing internal cache statistics.
+"""
+from fastapi import APIRouter, Depends
+from typing import Dict
+from server.app.core.cache import extraction_cache, llm_cache
+from server.app.core.answer_cache import answer_cache
+from server.app.external_services.service_registry import services
+from server.app.utils.auth import require_admin
+
+router = APIRouter()
+
+@router.get("/metrics/cache")
+def get_cache_stats(user: dict = Depends(require_admin)) -> Dict:
+    """
+    Returns hit/miss counters and sizes (admin only) of:
+    - the local extraction and LLM result caches
+    - the shared answer cache
+    - this process's vector index
+    """
+    return {
+        "extraction": extraction_cache.stats(),
+        "llm": llm_cache.stats(),
+        "answers": answer_cache.stats(),
+        "vector_index": services.vector_index.stats()
+    }
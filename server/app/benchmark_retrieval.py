@@ -0,0 +1,57 @@
+"""
+Latency and overlap benchmark for chat retrieval modes on one contract version.
+
+    python -m server.app.benchmark_retrieval <version_id> "what are the payment terms?" "termination notice period" --runs 5
+
+Each question is embedded once; every configuration is then run --runs times and the
+median per-stage timings and the chunks it returned are printed.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from typing import Dict, List
+from server.app.core.embedding_state import get_embeddings_generation
+from server.app.core.rate_limiter import aembed_query_limited
+from server.app.external_services.retrieval import RetrievalOptions
+from server.app.external_services.service_registry import services
+
+CONFIGURATIONS = [
+    RetrievalOptions(mode="vector", rerank=False),
+    RetrievalOptions(mode="lexical", rerank=False),
+    RetrievalOptions(mode="hybrid", rerank=False),
+    RetrievalOptions(mode="hybrid", rerank=True)
+]
+
+async def benchmark(version_id: str, questions: List[str], runs: int) -> List[Dict]:
+    retriever = services.retriever
+    generation = get_embeddings_generation(version_id)
+    report = []
+    for question in questions:
+        question_embedding = await aembed_query_limited(services.embeddings, question)
+        for options in CONFIGURATIONS:
+            timings: Dict[str, List[float]] = {}
+            chunks = []
+            for _ in range(runs):
+                chunks, run_timings = await retriever.retrieve(version_id, generation, question, question_embedding, options)
+                for stage, value in run_timings.items():
+                    timings.setdefault(stage, []).append(value)
+            report.append({
+                "question": question,
+                "options": options.signature(),
+                "median_ms": {stage: statistics.median(values) for stage, values in timings.items()},
+                "chunks": [chunk["chunk_id"] for chunk in chunks]
+            })
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat retrieval modes for a contract version.")
+    parser.add_argument("version_id")
+    parser.add_argument("questions", nargs="+")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per configuration (the first warms the indexes)")
+    args = parser.parse_args()
+    for row in asyncio.run(benchmark(args.version_id, args.questions, args.runs)):
+        print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
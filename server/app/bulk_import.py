@@ -0,0 +1,44 @@
+"""
+Command-line bulk import of a contract archive.
+
+    python -m server.app.bulk_import /path/to/archive --created-by <user uuid>
+    python -m server.app.bulk_import --manifest contracts.csv --created-by <user uuid>
+
+Re-running with the same checkpoint file skips files that were already imported.
+"""
+import argparse
+import asyncio
+import json
+import logging
+from server.app.core.supabase_client import create_supabase_client
+from server.app.external_services.bulk_importer import BulkImporter, iter_directory, iter_manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import contract PDFs into ClauseIQ.")
+    parser.add_argument("source_dir", nargs="?", help="Directory to import PDFs from (recursively)")
+    parser.add_argument("--manifest", help="CSV manifest with columns path,title[,expiry_date]")
+    parser.add_argument("--created-by", required=True, help="User id of the Contract Manager for imported contracts")
+    parser.add_argument("--checkpoint", default="bulk_import_checkpoint.json", help="Checkpoint file used to resume")
+    parser.add_argument("--status", default="Signed", help="Status for the imported contracts")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel storage uploads")
+    args = parser.parse_args()
+    if not args.source_dir and not args.manifest:
+        parser.error("either source_dir or --manifest is required")
+
+    logging.basicConfig(level=logging.INFO)
+    items = iter_manifest(args.manifest) if args.manifest else iter_directory(args.source_dir)
+    importer = BulkImporter(
+        supabase_client=create_supabase_client(),
+        created_by=args.created_by,
+        checkpoint_path=args.checkpoint,
+        contract_status=args.status,
+        batch_size=args.batch_size,
+        upload_concurrency=args.concurrency,
+        on_progress=lambda report: print(f"[INFO] {json.dumps(report)}")
+    )
+    report = asyncio.run(importer.run(items))
+    print(f"[INFO] Bulk import finished: {json.dumps(report)}")
+
+if __name__ == "__main__":
+    main()
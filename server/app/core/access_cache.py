@@ -0,0 +1,61 @@
+"""
+Short-lived shared cache of contract rows and participant roles used for access checks.
+
+Entries expire after ACCESS_CACHE_TTL_SECONDS; participant changes made through
+crud.contracts invalidate the affected membership immediately. Contract rows are not
+invalidated, so checks that must see the current status read it fresh.
+"""
+from typing import Any, Dict, Optional, Tuple
+import json
+import os
+import logging
+from server.app.core.redis_client import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ACCESS_CACHE_TTL_SECONDS = int(os.environ.get("ACCESS_CACHE_TTL_SECONDS", 30))
+
+CONTRACT_KEY = "clauseiq:contract:{contract_id}"
+MEMBER_KEY = "clauseiq:member:{contract_id}:{user_id}"
+
+def get_cached_access(contract_id: str, user_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Returns (contract row, {"role": role or None}) from the cache; either is None on a miss.
+    """
+    try:
+        contract_raw, member_raw = get_redis().mget(
+            CONTRACT_KEY.format(contract_id=contract_id),
+            MEMBER_KEY.format(contract_id=contract_id, user_id=user_id)
+        )
+    except Exception as e:
+        logger.warning(f"Access cache read failed for contract {contract_id}: {e}")
+        return None, None
+    return (
+        json.loads(contract_raw) if contract_raw is not None else None,
+        json.loads(member_raw) if member_raw is not None else None
+    )
+
+def cache_access(contract_id: str, user_id: str, contract: Optional[Dict[str, Any]] = None, role: Optional[str] = None, cache_role: bool = False) -> None:
+    """
+    Stores a contract row and/or the user's role (None meaning "not a participant").
+    """
+    try:
+        pipe = get_redis().pipeline()
+        if contract is not None:
+            pipe.set(CONTRACT_KEY.format(contract_id=contract_id), json.dumps(contract), ex=ACCESS_CACHE_TTL_SECONDS)
+        if cache_role:
+            pipe.set(
+                MEMBER_KEY.format(contract_id=contract_id, user_id=user_id),
+                json.dumps({"role": role}),
+                ex=ACCESS_CACHE_TTL_SECONDS
+            )
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Access cache write failed for contract {contract_id}: {e}")
+
+def invalidate_member(contract_id: str, user_id: str) -> None:
+    try:
+        get_redis().delete(MEMBER_KEY.format(contract_id=contract_id, user_id=user_id))
+    except Exception as e:
+        logger.warning(f"Access cache invalidation failed for contract {contract_id}: {e}")
@@ -0,0 +1,207 @@
+"""
+Two-level cache of chat answers, scoped per contract version.
+
+Level one matches the normalized question text exactly and is checked before anything
+else, so a hit costs a single Redis round trip. Level two matches near-duplicate
+questions by cosine similarity of the question embedding and skips retrieval and the
+LLM call. Entries are keyed on the version's embeddings generation, so re-embedding a
+version invalidates its answers; each version keeps at most ANSWER_CACHE_MAX_ENTRIES
+entries (least recently used evicted first) for at most ANSWER_CACHE_TTL_SECONDS.
+
+A version's question embeddings are stored as one packed value of fixed-size records
+(32-byte entry field + L2-normalized float32 vector), so a similarity lookup is one GET
+and one matrix-vector product. The methods are blocking; async callers run them in a thread.
+"""
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import time
+import logging
+import numpy as np
+from dotenv import load_dotenv
+from server.app.core.redis_client import get_redis, get_redis_binary
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_TTL_SECONDS", 24 * 60 * 60))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 100))
+ANSWER_CACHE_SIMILARITY = float(os.environ.get("ANSWER_CACHE_SIMILARITY", 0.95))
+
+ENTRIES_KEY = "clauseiq:answers:{version_id}:{generation}"
+VECTORS_KEY = "clauseiq:answer_vecs_packed:{version_id}:{generation}"
+LRU_KEY = "clauseiq:answers_lru:{version_id}:{generation}"
+STATS_KEY = "clauseiq:answer_cache_stats"
+
+def normalize_question(question: str) -> str:
+    """
+    Lowercases, collapses whitespace and drops trailing punctuation so trivially
+    different spellings of a question share an exact-match entry.
+    """
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?.! ")
+
+FIELD_BYTES = 32
+
+def _pack_record(field: str, vector: List[float]) -> bytes:
+    array = np.asarray(vector, dtype=np.float32)
+    array = array / (np.linalg.norm(array) + 1e-12)
+    return field.encode("ascii") + array.astype(np.float32).tobytes()
+
+def _unpack_records(blob: bytes, dim: int) -> Tuple[List[str], np.ndarray]:
+    """
+    Splits a packed value into its entry fields and an (n, dim) matrix of unit vectors.
+    """
+    record_size = FIELD_BYTES + 4 * dim
+    if not blob or len(blob) % record_size:
+        return [], np.empty((0, dim), dtype=np.float32)
+    records = np.frombuffer(blob, dtype=np.uint8).reshape(-1, record_size)
+    fields = [bytes(record[:FIELD_BYTES]).decode("ascii") for record in records]
+    matrix = np.ascontiguousarray(records[:, FIELD_BYTES:]).view(np.float32)
+    return fields, matrix
+
+class AnswerCache:
+    def __init__(
+        self,
+        ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+
+    def _keys(self, version_id: str, generation: int) -> Dict[str, str]:
+        return {
+            "entries": ENTRIES_KEY.format(version_id=version_id, generation=generation),
+            "vectors": VECTORS_KEY.format(version_id=version_id, generation=generation),
+            "lru": LRU_KEY.format(version_id=version_id, generation=generation)
+        }
+
+    def _field(self, question: str) -> str:
+        return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()[:32]
+
+    def _hit(self, keys: Dict[str, str], field: str, raw: str, kind: str) -> Optional[Dict]:
+        entry = json.loads(raw)
+        if time.time() - entry["created_at"] > self.ttl_seconds:
+            return None
+        redis_client = get_redis()
+        pipe = redis_client.pipeline()
+        pipe.zadd(keys["lru"], {field: time.time()})
+        pipe.hincrby(STATS_KEY, f"hits_{kind}", 1)
+        pipe.execute()
+        return {"answer": entry["answer"], "citations": entry["citations"]}
+
+    def get_exact(self, version_id: str, generation: int, question: str) -> Optional[Dict]:
+        """
+        Returns the cached answer for the same normalized question, or None.
+        """
+        try:
+            keys = self._keys(version_id, generation)
+            field = self._field(question)
+            raw = get_redis().hget(keys["entries"], field)
+            return self._hit(keys, field, raw, "exact") if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Answer cache exact lookup failed for version {version_id}: {e}")
+            return None
+
+    def get_similar(self, version_id: str, generation: int, question_embedding: List[float]) -> Optional[Dict]:
+        """
+        Returns the cached answer whose question embedding is most similar to this one,
+        if the cosine similarity clears the threshold, or None.
+        """
+        try:
+            keys = self._keys(version_id, generation)
+            redis_client = get_redis()
+            query = np.asarray(question_embedding, dtype=np.float32)
+            fields, matrix = _unpack_records(get_redis_binary().get(keys["vectors"]), len(query))
+            if fields:
+                scores = matrix @ (query / (np.linalg.norm(query) + 1e-12))
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    raw = redis_client.hget(keys["entries"], fields[best])
+                    if raw is not None:
+                        hit = self._hit(keys, fields[best], raw, "semantic")
+                        if hit is not None:
+                            return hit
+            redis_client.hincrby(STATS_KEY, "misses", 1)
+            return None
+        except Exception as e:
+            logger.warning(f"Answer cache similarity lookup failed for version {version_id}: {e}")
+            return None
+
+    def set(self, version_id: str, generation: int, question: str, question_embedding: List[float], result: Dict) -> None:
+        """
+        Stores an answer with its citations and evicts the least recently used entries
+        beyond the per-version limit.
+        """
+        try:
+            keys = self._keys(version_id, generation)
+            field = self._field(question)
+            entry = {
+                "question": question,
+                "answer": result["answer"],
+                "citations": result["citations"],
+                "created_at": time.time()
+            }
+            redis_client = get_redis()
+            binary_client = get_redis_binary()
+            is_new = redis_client.hget(keys["entries"], field) is None
+            pipe = redis_client.pipeline()
+            pipe.hset(keys["entries"], field, json.dumps(entry))
+            pipe.zadd(keys["lru"], {field: time.time()})
+            pipe.expire(keys["entries"], self.ttl_seconds)
+            pipe.expire(keys["lru"], self.ttl_seconds)
+            pipe.execute()
+            if is_new:
+                pipe = binary_client.pipeline()
+                pipe.append(keys["vectors"], _pack_record(field, question_embedding))
+                pipe.expire(keys["vectors"], self.ttl_seconds)
+                pipe.execute()
+
+            overflow = redis_client.zcard(keys["lru"]) - self.max_entries
+            if overflow > 0:
+                evicted = {member for member, _ in redis_client.zpopmin(keys["lru"], overflow)}
+                pipe = redis_client.pipeline()
+                pipe.hdel(keys["entries"], *evicted)
+                pipe.hincrby(STATS_KEY, "evictions", len(evicted))
+                pipe.execute()
+                # Rewrite the packed vectors without the evicted records
+                dim = len(question_embedding)
+                record_size = FIELD_BYTES + 4 * dim
+                blob = binary_client.get(keys["vectors"]) or b""
+                kept = b"".join(
+                    blob[i:i + record_size] for i in range(0, len(blob) - record_size + 1, record_size)
+                    if blob[i:i + FIELD_BYTES].decode("ascii") not in evicted
+                )
+                binary_client.set(keys["vectors"], kept, ex=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Answer cache write failed for version {version_id}: {e}")
+
+    def stats(self) -> Dict:
+        """
+        Returns hit/miss counters shared by all processes.
+        """
+        try:
+            counters = {name: int(value) for name, value in get_redis().hgetall(STATS_KEY).items()}
+        except Exception as e:
+            logger.warning(f"Failed to read answer cache stats: {e}")
+            counters = {}
+        hits = counters.get("hits_exact", 0) + counters.get("hits_semantic", 0)
+        lookups = hits + counters.get("misses", 0)
+        return {
+            "hits_exact": counters.get("hits_exact", 0),
+            "hits_semantic": counters.get("hits_semantic", 0),
+            "misses": counters.get("misses", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "max_entries_per_version": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold
+        }
+
+answer_cache = AnswerCache()
@@ -0,0 +1,182 @@
+"""
+Persistent local-disk caches shared by the API and worker processes on a host.
+
+Entries live in a SQLite file so several processes can read and write them safely.
+Each cache evicts least recently used entries once its total size goes over the limit,
+optionally expires entries after a TTL, and keeps hit/miss counters in the same file
+so any process can report them.
+"""
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import logging
+import zlib
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get(
+    "CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), '..', '.cache')
+)
+
+class DiskCache:
+    def __init__(self, name: str, max_bytes: int, ttl_seconds: Optional[int] = None, cache_dir: str = CACHE_DIR):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{name}.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, key TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps the cache safe to use after Celery forks workers.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _count(self, conn: sqlite3.Connection, counter: str) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (counter,)
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached value for key, or None on a miss.
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._count(conn, "expirations")
+                    row = None
+                if row is None:
+                    self._count(conn, "misses")
+                    return None
+                conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                self._count(conn, "hits")
+            return json.loads(zlib.decompress(row[0]))
+        except Exception as e:
+            # A broken cache must never break extraction; treat it as a miss.
+            logger.warning(f"{self.name} cache read failed for {key}: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a JSON-serializable value under key and evicts old entries if needed.
+        """
+        try:
+            blob = zlib.compress(json.dumps(value).encode("utf-8"))
+            now = time.time()
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, blob, len(blob), now, now)
+                )
+                self._evict(conn)
+        except Exception as e:
+            logger.warning(f"{self.name} cache write failed for {key}: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+            self._count(conn, "evictions")
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def resolve_alias(self, alias: str) -> Optional[str]:
+        """
+        Returns the key recorded for an alias (e.g. a storage URL), if any.
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT key FROM aliases WHERE alias = ?", (alias,)).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.warning(f"{self.name} cache alias lookup failed for {alias}: {e}")
+            return None
+
+    def set_alias(self, alias: str, key: str) -> None:
+        """
+        Records that alias refers to the entry stored under key.
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO aliases (alias, key) VALUES (?, ?)", (alias, key))
+        except Exception as e:
+            logger.warning(f"{self.name} cache alias write failed for {alias}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss/eviction counters and the current size of the cache.
+        """
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": counters.get("evictions", 0),
+            "expirations": counters.get("expirations", 0),
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+def prompt_version(template: str) -> str:
+    """
+    Returns a short fingerprint of a prompt template. Any edit to the template
+    changes the fingerprint, so cached LLM results for the old prompt stop matching.
+    """
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+def llm_cache_key(model: str, prompt_ver: str, *inputs: str) -> str:
+    """
+    Builds the LLM result cache key from the model, prompt version and input texts.
+    """
+    digest = hashlib.sha256()
+    for part in (model, prompt_ver, *inputs):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+# PDF SHA-256 -> extracted per-page text and layout
+extraction_cache = DiskCache(
+    "extraction",
+    max_bytes=int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+)
+
+# (model, prompt version, input text hash) -> parsed LLM result
+llm_cache = DiskCache(
+    "llm",
+    max_bytes=int(os.environ.get("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+    ttl_seconds=int(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+)
@@ -0,0 +1,35 @@
+"""
+Per-version generation counter for stored embeddings.
+
+The embedding task bumps a version's generation every time it rewrites that version's
+chunks. Anything derived from the embeddings (cached answers, in-memory indexes) is
+keyed on the generation it was built from, so a bump invalidates it everywhere.
+"""
+import logging
+from server.app.core.redis_client import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "clauseiq:embeddings_gen:{version_id}"
+
+def get_embeddings_generation(version_id: str) -> int:
+    """
+    Returns the current embeddings generation of a version (0 if never bumped),
+    or -1 when Redis is unavailable so callers can skip generation-keyed caches.
+    """
+    try:
+        value = get_redis().get(GENERATION_KEY.format(version_id=version_id))
+    except Exception as e:
+        logger.warning(f"Failed to read embeddings generation for version {version_id}: {e}")
+        return -1
+    return int(value) if value is not None else 0
+
+def bump_embeddings_generation(version_id: str) -> None:
+    """
+    Marks a version's embeddings as changed.
+    """
+    try:
+        get_redis().incr(GENERATION_KEY.format(version_id=version_id))
+    except Exception as e:
+        logger.warning(f"Failed to bump embeddings generation for version {version_id}: {e}")
@@ -0,0 +1,100 @@
+"""
+Async, connection-pooled HTTP client for downloading files (e.g. contract PDFs from Supabase Storage).
+
+One httpx.AsyncClient is kept per event loop so keep-alive connections are reused across
+downloads, concurrent downloads are bounded by a semaphore, and transient failures are
+retried with exponential backoff.
+"""
+from typing import Optional
+import asyncio
+import os
+import random
+import logging
+import weakref
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TIMEOUT_SECONDS", 60))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", 10))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_CONCURRENT_DOWNLOADS = int(os.environ.get("HTTP_MAX_CONCURRENT_DOWNLOADS", 8))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_SECONDS = float(os.environ.get("HTTP_BACKOFF_SECONDS", 0.5))
+# Upper bound on any single retry delay, including one requested through Retry-After
+HTTP_MAX_BACKOFF_SECONDS = float(os.environ.get("HTTP_MAX_BACKOFF_SECONDS", 30))
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# httpx clients and semaphores are bound to the loop they were created on
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the pooled client for the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=30
+            ),
+            follow_redirects=True
+        )
+        _clients[loop] = client
+        _semaphores[loop] = asyncio.Semaphore(HTTP_MAX_CONCURRENT_DOWNLOADS)
+    return client
+
+async def close_http_client() -> None:
+    """
+    Closes the pooled client of the running event loop, if there is one.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.pop(loop, None)
+    _semaphores.pop(loop, None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_MAX_BACKOFF_SECONDS)
+    return min(HTTP_BACKOFF_SECONDS * (2 ** (attempt - 1)) + random.uniform(0, HTTP_BACKOFF_SECONDS), HTTP_MAX_BACKOFF_SECONDS)
+
+async def download_bytes(url: str) -> bytes:
+    """
+    Downloads url and returns the response body.
+    Retries timeouts, connection errors and retryable status codes with backoff;
+    raises httpx.HTTPError once the retries are exhausted.
+    """
+    client = get_http_client()
+    semaphore = _semaphores[asyncio.get_running_loop()]
+    async with semaphore:
+        for attempt in range(1, HTTP_MAX_RETRIES + 1):
+            try:
+                response = await client.get(url)
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < HTTP_MAX_RETRIES:
+                    delay = _retry_delay(attempt, response)
+                    logger.warning(f"Download of {url} returned {response.status_code}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.content
+            except httpx.TransportError as e:
+                if attempt == HTTP_MAX_RETRIES:
+                    raise e
+                delay = _retry_delay(attempt)
+                logger.warning(f"Download of {url} failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    raise httpx.HTTPError(f"Download of {url} failed after {HTTP_MAX_RETRIES} attempts")
@@ -0,0 +1,57 @@
+"""
+Per-version store for extracted PDF page text.
+
+The ingestion task downloads and parses a version's PDF once and saves the pages
+here, so the downstream AI tasks can read them instead of extracting the file again.
+The workflow's chord callback deletes them once every stage has finished; the TTL only
+cleans up after workflows that never reach it.
+"""
+from typing import Dict, List, Optional
+import json
+import os
+import logging
+from server.app.core.redis_client import get_redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PAGES_KEY = "clauseiq:pages:{version_id}"
+PAGES_TTL_SECONDS = int(os.environ.get("PAGES_TTL_SECONDS", 30 * 60))
+
+def save_pages(version_id: str, pages: List[Dict]) -> None:
+    """
+    Stores the extracted pages ([{"page": 1, "text": "..."}, ...]) for a version.
+    """
+    try:
+        get_redis().set(PAGES_KEY.format(version_id=version_id), json.dumps(pages), ex=PAGES_TTL_SECONDS)
+    except Exception as e:
+        # The store is an optimization; callers fall back to extracting the PDF.
+        logger.warning(f"Failed to store pages for version {version_id}: {e}")
+
+def load_pages(version_id: str) -> Optional[List[Dict]]:
+    """
+    Returns the stored pages for a version, or None if they are not available.
+    """
+    try:
+        raw = get_redis().get(PAGES_KEY.format(version_id=version_id))
+    except Exception as e:
+        logger.warning(f"Failed to load pages for version {version_id}: {e}")
+        return None
+    if raw is None:
+        return None
+    return json.loads(raw)
+
+def delete_pages(version_id: str) -> None:
+    """
+    Drops the stored pages of a version whose workflow has finished.
+    """
+    try:
+        get_redis().delete(PAGES_KEY.format(version_id=version_id))
+    except Exception as e:
+        logger.warning(f"Failed to delete pages for version {version_id}: {e}")
+
+def pages_to_text(pages: List[Dict]) -> str:
+    """
+    Joins page records back into the full document text.
+    """
+    return "".join(page["text"] for page in pages)
@@ -0,0 +1,195 @@
+"""
+Redis-backed rate limiting for OpenAI calls, shared by every API and worker process.
+
+Each model has two token buckets - requests per minute and tokens per minute - that are
+checked and debited atomically by a Lua script. When the API still answers 429, the model
+gets a shared cooldown so all processes back off together instead of retrying in a storm.
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, TypeVar
+import asyncio
+import json
+import os
+import random
+import logging
+import openai
+from dotenv import load_dotenv
+from server.app.core.redis_client import get_redis
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Per-model limits; override with OPENAI_RATE_LIMITS='{"gpt-4.1": {"rpm": 500, "tpm": 30000}}'
+DEFAULT_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+    "gpt-4.1": {"rpm": 500, "tpm": 30000},
+    "gpt-3.5-turbo": {"rpm": 3500, "tpm": 200000},
+    "text-embedding-3-small": {"rpm": 3000, "tpm": 1000000},
+}
+RATE_LIMITS = {**DEFAULT_RATE_LIMITS, **json.loads(os.environ.get("OPENAI_RATE_LIMITS", "{}"))}
+FALLBACK_LIMIT = {"rpm": 500, "tpm": 30000}
+# Completion tokens reserved per chat call on top of the prompt estimate
+EXPECTED_OUTPUT_TOKENS = int(os.environ.get("OPENAI_EXPECTED_OUTPUT_TOKENS", 1000))
+RATE_LIMIT_MAX_RETRIES = int(os.environ.get("OPENAI_RATE_LIMIT_MAX_RETRIES", 5))
+RATE_LIMIT_BACKOFF_SECONDS = float(os.environ.get("OPENAI_RATE_LIMIT_BACKOFF_SECONDS", 2))
+
+# KEYS: request bucket, token bucket, cooldown key. ARGV: rpm, tpm, tokens needed.
+# Returns 0 when both buckets were debited, otherwise the milliseconds to wait.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local cooldown = tonumber(redis.call('GET', KEYS[3]) or '0')
+if cooldown > now then
+  return cooldown - now
+end
+local function level(key, capacity)
+  local data = redis.call('HMGET', key, 'level', 'ts')
+  local lvl = tonumber(data[1])
+  local ts = tonumber(data[2])
+  if lvl == nil then
+    return capacity
+  end
+  return math.min(capacity, lvl + (now - ts) * capacity / 60000)
+end
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local need = tonumber(ARGV[3])
+local requests = level(KEYS[1], rpm)
+local tokens = level(KEYS[2], tpm)
+if requests >= 1 and tokens >= need then
+  redis.call('HSET', KEYS[1], 'level', requests - 1, 'ts', now)
+  redis.call('HSET', KEYS[2], 'level', tokens - need, 'ts', now)
+  redis.call('PEXPIRE', KEYS[1], 120000)
+  redis.call('PEXPIRE', KEYS[2], 120000)
+  return 0
+end
+local wait = 0
+if requests < 1 then
+  wait = (1 - requests) * 60000 / rpm
+end
+if tokens < need then
+  wait = math.max(wait, (need - tokens) * 60000 / tpm)
+end
+return math.ceil(wait)
+"""
+
+# KEYS: cooldown key. ARGV: delay in ms. Extends (never shortens) the model's cooldown.
+_COOLDOWN_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local delay = tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if now + delay > current then
+  redis.call('SET', KEYS[1], now + delay, 'PX', delay)
+end
+return 0
+"""
+
+def _keys(model: str) -> List[str]:
+    prefix = f"clauseiq:ratelimit:{model}"
+    return [f"{prefix}:requests", f"{prefix}:tokens", f"{prefix}:cooldown"]
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) used to debit the token bucket.
+    """
+    return sum(len(text) for text in texts) // 4 + 1
+
+async def acquire(model: str, tokens: int) -> None:
+    """
+    Waits until the model's shared request and token buckets allow a call of this size.
+    Fails open (logs and returns) if Redis is unavailable.
+    """
+    limits = RATE_LIMITS.get(model, FALLBACK_LIMIT)
+    # A single call larger than the whole bucket could never be admitted otherwise
+    tokens = min(tokens, limits["tpm"])
+    while True:
+        try:
+            wait_ms = await asyncio.to_thread(
+                get_redis().eval, _ACQUIRE_SCRIPT, 3, *_keys(model), limits["rpm"], limits["tpm"], tokens
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable for {model}, continuing without it: {e}")
+            return
+        if not wait_ms:
+            return
+        await asyncio.sleep(int(wait_ms) / 1000)
+
+def report_throttled(model: str, delay_seconds: float) -> None:
+    """
+    Puts the model into a shared cooldown after the API signalled throttling.
+    """
+    try:
+        get_redis().eval(_COOLDOWN_SCRIPT, 1, _keys(model)[2], max(1, int(delay_seconds * 1000)))
+    except Exception as e:
+        logger.warning(f"Failed to record throttling for {model}: {e}")
+
+def _throttle_delay(attempt: int, error: openai.RateLimitError) -> float:
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+    return RATE_LIMIT_BACKOFF_SECONDS * (2 ** (attempt - 1)) + random.uniform(0, RATE_LIMIT_BACKOFF_SECONDS)
+
+async def call_rate_limited(model: str, tokens: int, call: Callable[[], Awaitable[T]]) -> T:
+    """
+    Runs call once the model's budget allows it. On 429 responses every process backs
+    off for the advertised (or exponential) delay, then the call is retried.
+    """
+    for attempt in range(1, RATE_LIMIT_MAX_RETRIES + 1):
+        await acquire(model, tokens)
+        try:
+            return await call()
+        except openai.RateLimitError as e:
+            if attempt == RATE_LIMIT_MAX_RETRIES:
+                raise e
+            delay = _throttle_delay(attempt, e)
+            logger.warning(f"{model} throttled (attempt {attempt}), backing off {delay:.1f}s")
+            await asyncio.to_thread(report_throttled, model, delay)
+
+async def ainvoke_limited(llm: Any, messages: List[Any]) -> Any:
+    """
+    Rate-limited llm.ainvoke(messages).
+    """
+    tokens = estimate_tokens(*(str(message.content) for message in messages)) + EXPECTED_OUTPUT_TOKENS
+    return await call_rate_limited(llm.model_name, tokens, lambda: llm.ainvoke(messages))
+
+async def astream_limited(llm: Any, messages: List[Any]) -> AsyncIterator[str]:
+    """
+    Rate-limited llm.astream(messages), yielding the text of each chunk. A throttled
+    request is retried only if it failed before the first chunk was sent.
+    """
+    tokens = estimate_tokens(*(str(message.content) for message in messages)) + EXPECTED_OUTPUT_TOKENS
+    for attempt in range(1, RATE_LIMIT_MAX_RETRIES + 1):
+        await acquire(llm.model_name, tokens)
+        started = False
+        try:
+            async for chunk in llm.astream(messages):
+                started = True
+                if chunk.content:
+                    yield chunk.content
+            return
+        except openai.RateLimitError as e:
+            if started or attempt == RATE_LIMIT_MAX_RETRIES:
+                raise e
+            delay = _throttle_delay(attempt, e)
+            logger.warning(f"{llm.model_name} stream throttled (attempt {attempt}), backing off {delay:.1f}s")
+            await asyncio.to_thread(report_throttled, llm.model_name, delay)
+
+async def aembed_query_limited(embeddings: Any, text: str) -> List[float]:
+    """
+    Rate-limited embeddings.aembed_query(text).
+    """
+    return await call_rate_limited(embeddings.model, estimate_tokens(text), lambda: embeddings.aembed_query(text))
+
+async def aembed_documents_limited(embeddings: Any, texts: List[str]) -> List[List[float]]:
+    """
+    Rate-limited embeddings.aembed_documents(texts); the batch counts as one request.
+    """
+    return await call_rate_limited(embeddings.model, estimate_tokens(*texts), lambda: embeddings.aembed_documents(texts))
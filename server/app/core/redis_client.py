@@ -0,0 +1,34 @@
+"""
+Shared Redis connection for state that has to be visible across API and worker processes.
+"""
+import os
+from typing import Optional
+import redis
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Same Redis instance Celery uses as broker/backend
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+_client: Optional[redis.Redis] = None
+_binary_client: Optional[redis.Redis] = None
+
+def get_redis() -> redis.Redis:
+    """
+    Returns the process-wide Redis client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _client
+
+def get_redis_binary() -> redis.Redis:
+    """
+    Returns a process-wide Redis client that returns raw bytes, for packed binary values.
+    """
+    global _binary_client
+    if _binary_client is None:
+        _binary_client = redis.Redis.from_url(REDIS_URL)
+    return _binary_client
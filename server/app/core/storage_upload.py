@@ -0,0 +1,182 @@
+"""
+Streaming uploads of contract PDFs to Supabase Storage.
+
+The upload body is sent to the Storage REST API as a chunked request while it is
+being read, so the API never holds a whole file in memory. The same pass computes
+the SHA-256, the size and the page count, and rejects non-PDF or oversized files.
+"""
+from typing import AsyncIterator, Optional
+import hashlib
+import os
+import re
+import logging
+from dotenv import load_dotenv
+from server.app.core.http_client import get_http_client
+from server.app.core.supabase_client import SUPABASE_URL, SUPABASE_SERVICE_KEY
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_BYTES = int(os.environ.get("UPLOAD_CHUNK_BYTES", 1024 * 1024))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 100 * 1024 * 1024))
+
+# "12 0 obj", the end of an object's dictionary ("endobj", or ">> stream" plus EOL) and "%%EOF"
+_OBJ_RE = re.compile(rb"(\d+)\s+\d+\s+obj(?![a-zA-Z])")
+_HEADER_END_RE = re.compile(rb"(>>\s*stream(?:\r\n|\n|\r))|(?<![a-zA-Z])endobj(?![a-zA-Z])")
+_EOF_RE = re.compile(rb"%%EOF")
+# Keys looked up inside one object's dictionary
+_PAGES_RE = re.compile(rb"/Type\s*/Pages(?![a-zA-Z0-9])")
+_PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z0-9])")
+_OBJSTM_RE = re.compile(rb"/Type\s*/ObjStm(?![a-zA-Z0-9])")
+_PARENT_RE = re.compile(rb"/Parent(?![a-zA-Z0-9])")
+_COUNT_RE = re.compile(rb"/Count\s+(\d+)")
+# Unconsumed bytes kept between chunks so markers split across chunks are still found
+_TAIL_BYTES = 64
+# Object dictionaries larger than this are not buffered; the page count is then unknown
+_MAX_DICT_BYTES = 1024 * 1024
+
+class InvalidPdfError(ValueError):
+    pass
+
+class UploadTooLargeError(ValueError):
+    pass
+
+class PdfStreamInspector:
+    """
+    Incrementally hashes and measures a PDF as its chunks go by.
+
+    Object dictionaries are scanned one at a time (stream data is skipped), so page tree
+    keys are only read from /Type /Pages dictionaries and never from e.g. /Outlines.
+    """
+    def __init__(self, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._head = b""
+        self._buffer = b""
+        self._state = "outside"  # outside, dict (inside an object's dictionary) or stream
+        self._object_num = 0
+        self._root_count: Optional[int] = None
+        self._page_objects: set = set()
+        self._object_streams = False
+        self._eof_markers = 0
+        self._unknown = False
+
+    def feed(self, chunk: bytes) -> None:
+        if len(self._head) < 5:
+            self._head += chunk[:5]
+            if not b"%PDF-".startswith(self._head[:5]):
+                raise InvalidPdfError("Uploaded file is not a PDF.")
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(f"Uploaded file exceeds {self.max_bytes} bytes.")
+        self._sha256.update(chunk)
+
+        if self._unknown:
+            return
+        self._buffer += chunk
+        while self._consume():
+            pass
+
+    def _consume(self) -> bool:
+        """
+        Advances the scanner over the buffer; returns False once it needs more bytes.
+        """
+        buffer = self._buffer
+        if self._state == "outside":
+            match = _OBJ_RE.search(buffer)
+            # The lookahead after "obj" is only decided once the next byte has arrived
+            if match and match.end() < len(buffer):
+                self._eof_markers += len(_EOF_RE.findall(buffer, 0, match.start()))
+                self._object_num = int(match.group(1))
+                self._buffer = buffer[match.end():]
+                self._state = "dict"
+                return True
+            cut = max(0, len(buffer) - _TAIL_BYTES)
+            if match:
+                cut = min(cut, match.start())
+            for marker in _EOF_RE.finditer(buffer):
+                if marker.end() > cut:
+                    cut = min(cut, marker.start())
+                    break
+            # Don't split an object number
+            while cut > 0 and buffer[cut - 1:cut].isdigit():
+                cut -= 1
+            self._eof_markers += len(_EOF_RE.findall(buffer, 0, cut))
+            self._buffer = buffer[cut:]
+            return False
+
+        if self._state == "dict":
+            match = _HEADER_END_RE.search(buffer)
+            if match and (match.group(1) or match.end() < len(buffer)):
+                self._inspect_dict(buffer[:match.start()])
+                self._buffer = buffer[match.end():]
+                self._state = "stream" if match.group(1) else "outside"
+                return True
+            if len(buffer) > _MAX_DICT_BYTES:
+                self._unknown = True
+                self._buffer = b""
+            return False
+
+        end = buffer.find(b"endstream")
+        if end >= 0:
+            self._buffer = buffer[end + len(b"endstream"):]
+            self._state = "outside"
+            return True
+        self._buffer = buffer[-(len(b"endstream") - 1):]
+        return False
+
+    def _inspect_dict(self, text: bytes) -> None:
+        if _OBJSTM_RE.search(text):
+            self._object_streams = True
+        elif _PAGES_RE.search(text):
+            # The root of the page tree has no /Parent; an incremental update rewrites it
+            # later in the file, so the last root seen wins
+            count = _COUNT_RE.search(text)
+            if count and not _PARENT_RE.search(text):
+                self._root_count = int(count.group(1))
+        elif _PAGE_RE.search(text):
+            self._page_objects.add(self._object_num)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def page_count(self) -> Optional[int]:
+        """
+        The root page tree's /Count, else the number of page objects of a single-revision
+        file without object streams; None whenever neither can be read reliably. The
+        ingestion step still reads the exact pages.
+        """
+        if self._unknown:
+            return None
+        if self._root_count is not None:
+            return self._root_count
+        eof_markers = self._eof_markers
+        if self._state == "outside":
+            eof_markers += len(_EOF_RE.findall(self._buffer))
+        if self._page_objects and not self._object_streams and eof_markers <= 1:
+            return len(self._page_objects)
+        return None
+
+async def stream_upload(bucket: str, path: str, chunks: AsyncIterator[bytes], content_type: str = "application/pdf") -> None:
+    """
+    Uploads an object to storage from an async iterator of chunks.
+    """
+    client = get_http_client()
+    response = await client.post(
+        f"{SUPABASE_URL}/storage/v1/object/{bucket}/{path}",
+        content=chunks,
+        headers={
+            "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+            "apikey": SUPABASE_SERVICE_KEY,
+            "Content-Type": content_type,
+            "x-upsert": "false"
+        }
+    )
+    if response.status_code >= 400:
+        raise Exception(f"Storage upload failed ({response.status_code}): {response.text}")
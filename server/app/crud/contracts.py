@@ -1,6 +1,13 @@
 from server.app.core.supabase_client import supabase
 from server.app.models.contracts import ContractCreate
-from typing import Dict, Any
+from server.app.core.access_cache import get_cached_access, cache_access, invalidate_member
+from server.app.core.storage_upload import stream_upload
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple, TypeVar
+import asyncio
+import os
+
+T = TypeVar("T")
 
 def create_contract(contract_data: Dict[str, Any], user_jwt: str) -> Dict[str, Any]:
     # Set the session for this request to the user's JWT
@@ -11,12 +18,13 @@ def create_contract(contract_data: Dict[str, Any], user_jwt: str) -> Dict[str, A
     else:
         raise Exception(f"Failed to create contract: {response.error}")
 
-def create_contract_version(contract_id: str, version_num: int, file_url: str, status: str = "Draft") -> dict:
+def create_contract_version(contract_id: str, version_num: int, file_url: str, status: str = "Draft", file_metadata: Optional[Dict[str, Any]] = None) -> dict:
     response = supabase.table("contract_versions").insert({
         "contract_id": contract_id,
         "version_num": version_num,
         "file_url": file_url,
-        "status": status
+        "status": status,
+        **(file_metadata or {})
     }).execute()
     if response.data:
         return response.data[0]
@@ -38,6 +46,7 @@ def upsert_participant(contract_id: str, user_id: str, role: str, signing_order:
         data, 
         on_conflict="contract_id,user_id"
     ).execute()
+    invalidate_member(contract_id, user_id)
     
     if response.data:
         return response.data[0]
@@ -46,6 +55,173 @@ def upsert_participant(contract_id: str, user_id: str, role: str, signing_order:
 def remove_participant(contract_id: str, user_id: str) -> None:
     """Removes a participant from a contract. No error is raised if the participant doesn't exist."""
     supabase.table("contract_participants").delete().eq("contract_id", contract_id).eq("user_id", user_id).execute()
+    invalidate_member(contract_id, user_id)
     # The line "if response.error" was removed because the modern Supabase client
     # raises an exception on database errors instead of returning an error attribute.
-    # A successful execution (even if 0 rows are deleted) will now correctly do nothing. 
\ No newline at end of file
+    # A successful execution (even if 0 rows are deleted) will now correctly do nothing.
+
+# Async repository functions for the API. supabase-py is synchronous, so each query runs
+# on a bounded thread pool instead of the event loop, and independent queries of one
+# request are issued concurrently.
+
+DB_THREAD_POOL_SIZE = int(os.environ.get("DB_THREAD_POOL_SIZE", 32))
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREAD_POOL_SIZE, thread_name_prefix="db")
+
+async def run_query(fn: Callable[[], T]) -> T:
+    """Runs a blocking Supabase call on the DB thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(_db_executor, fn)
+
+def _first(response) -> Optional[Dict[str, Any]]:
+    return response.data[0] if response.data else None
+
+async def get_participant_role(contract_id: str, user_id: str) -> Optional[str]:
+    """Returns the user's role on the contract, or None if they are not a participant."""
+    row = _first(await run_query(lambda: supabase.table("contract_participants").select("role").eq(
+        "contract_id", contract_id
+    ).eq("user_id", user_id).limit(1).execute()))
+    return row["role"] if row else None
+
+def get_contract_status(contract_id: str) -> Optional[str]:
+    """Reads the contract's current status, bypassing the access cache."""
+    row = _first(supabase.table("contracts").select("status").eq("id", contract_id).limit(1).execute())
+    return row["status"] if row else None
+
+async def get_contract(contract_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+    return _first(await run_query(
+        lambda: supabase.table("contracts").select(columns).eq("id", contract_id).limit(1).execute()
+    ))
+
+async def list_versions(contract_id: str, columns: str = "*") -> List[Dict[str, Any]]:
+    response = await run_query(lambda: supabase.table("contract_versions").select(columns).eq(
+        "contract_id", contract_id
+    ).order("version_num").execute())
+    return response.data or []
+
+async def get_latest_version(contract_id: str) -> Optional[Dict[str, Any]]:
+    """Returns id, version_num and file_url of the newest version, or None."""
+    return _first(await run_query(lambda: supabase.table("contract_versions").select(
+        "id, version_num, file_url"
+    ).eq("contract_id", contract_id).order("version_num", desc=True).limit(1).execute()))
+
+async def get_versions_by_id(version_ids: List[str], columns: str = "id, file_url") -> Dict[str, Dict[str, Any]]:
+    """Fetches several versions in one query, keyed by id."""
+    response = await run_query(
+        lambda: supabase.table("contract_versions").select(columns).in_("id", version_ids).execute()
+    )
+    return {row["id"]: row for row in response.data or []}
+
+async def list_participants_with_users(contract_id: str) -> List[Dict[str, Any]]:
+    response = await run_query(lambda: supabase.table("contract_participants").select(
+        "*, users!inner(email)"
+    ).eq("contract_id", contract_id).execute())
+    return response.data or []
+
+async def list_ai_tasks(contract_id: str, columns: str = "*") -> List[Dict[str, Any]]:
+    response = await run_query(
+        lambda: supabase.table("ai_tasks").select(columns).eq("contract_id", contract_id).execute()
+    )
+    return response.data or []
+
+async def load_contract_access(contract_id: str, user_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Returns (contract row, user's role) for access checks, from the shared access cache
+    when possible; whatever is missing is queried concurrently and cached. The contract
+    is None if it does not exist, the role None if the user is not a participant.
+    """
+    contract, member = await run_query(lambda: get_cached_access(contract_id, user_id))
+    if contract is not None and member is not None:
+        return contract, member["role"]
+
+    async def _cached(value):
+        return value
+
+    contract_task = _cached(contract) if contract is not None else get_contract(contract_id)
+    role_task = _cached(member["role"]) if member is not None else get_participant_role(contract_id, user_id)
+    contract_row, role = await asyncio.gather(contract_task, role_task)
+    if contract_row is not None:
+        await run_query(lambda: cache_access(
+            contract_id, user_id,
+            contract=contract_row if contract is None else None,
+            role=role,
+            cache_role=member is None
+        ))
+    return contract_row, role
+
+AI_TASK_SUMMARY_COLUMNS = "version_id, type, status, updated_at, started_at, finished_at, duration_ms, error"
+
+async def list_user_contracts_page(
+    user_id: str,
+    limit: int,
+    cursor: Optional[Tuple[str, str]] = None,
+    status: Optional[str] = None,
+    role: Optional[str] = None,
+    search: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns up to limit + 1 of the user's contracts, newest update first, starting after
+    the (updated_at, id) cursor. The extra row tells the caller whether another page exists.
+    """
+    def _query():
+        query = supabase.table("user_contracts").select(
+            "id, title, status, expiry_date, created_by, created_at, updated_at, role"
+        ).eq("user_id", user_id)
+        if status:
+            query = query.eq("status", status)
+        if role:
+            query = query.eq("role", role)
+        if search:
+            query = query.ilike("title", f"%{search}%")
+        if cursor:
+            updated_at, contract_id = cursor
+            query = query.or_(
+                f'updated_at.lt."{updated_at}",and(updated_at.eq."{updated_at}",id.lt.{contract_id})'
+            )
+        return query.order("updated_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+    response = await run_query(_query)
+    return response.data or []
+
+async def get_user_status_counts(user_id: str) -> Dict[str, int]:
+    """Returns {status: number of contracts} across all of the user's contracts."""
+    response = await run_query(
+        lambda: supabase.rpc("user_contract_status_counts", {"p_user_id": user_id}).execute()
+    )
+    return {row["status"]: row["total"] for row in response.data or []}
+
+async def get_version_results(contract_id: str, version_id: str, task_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Returns type, status, result and updated_at of a version's AI tasks."""
+    def _query():
+        query = supabase.table("ai_tasks").select("type, status, result, updated_at").eq(
+            "contract_id", contract_id
+        ).eq("version_id", version_id)
+        if task_types:
+            query = query.in_("type", task_types)
+        return query.execute()
+    response = await run_query(_query)
+    return response.data or []
+
+async def get_contract_detail(contract_id: str, include_results: bool = False) -> Dict[str, Any]:
+    """
+    Loads the contract row (fresh, not from the access cache), versions, participants and
+    AI tasks shown on the contract detail page, with the queries running concurrently.
+    AI task result payloads are only loaded when include_results is set.
+    """
+    contract, versions, participants, ai_tasks = await asyncio.gather(
+        get_contract(contract_id),
+        list_versions(contract_id),
+        list_participants_with_users(contract_id),
+        list_ai_tasks(contract_id, columns="*" if include_results else AI_TASK_SUMMARY_COLUMNS)
+    )
+    return {
+        "contract": contract,
+        "versions": versions,
+        "participants": participants,
+        "ai_tasks": ai_tasks
+    }
+
+async def create_contract_version_async(contract_id: str, version_num: int, file_url: str, status: str = "Draft", file_metadata: Optional[Dict[str, Any]] = None) -> dict:
+    return await run_query(lambda: create_contract_version(contract_id, version_num, file_url, status, file_metadata))
+
+async def upload_contract_file(file_path: str, chunks: AsyncIterator[bytes], content_type: str) -> str:
+    """Streams a version file to the contracts bucket and returns its public URL."""
+    await stream_upload("contracts", file_path, chunks, content_type)
+    return supabase.storage.from_("contracts").get_public_url(file_path)
@@ -0,0 +1,248 @@
+"""
+Bulk import of an archive of contract PDFs.
+
+Files are read from a local directory or a CSV manifest, contracts/participants/versions
+are created with batched inserts, PDFs are uploaded to storage with bounded parallelism,
+and every imported version is sent through the AI workflow on the bulk lane. Each item is
+checkpointed once its workflow is queued, and the rows of items that fail part-way are
+deleted, so an interrupted import resumes where it stopped without duplicating contracts.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+import asyncio
+import csv
+import json
+import os
+import time
+import logging
+import fitz  # PyMuPDF
+from supabase import Client
+from server.app.tasks.workflow import start_version_workflow
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ImportItem:
+    path: str
+    title: str
+    expiry_date: Optional[str] = None
+
+def iter_directory(source_dir: str) -> Iterator[ImportItem]:
+    """
+    Yields every PDF under source_dir (recursively, in a stable order), titled by file name.
+    """
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield ImportItem(path=os.path.join(root, name), title=os.path.splitext(name)[0])
+
+def iter_manifest(manifest_path: str) -> Iterator[ImportItem]:
+    """
+    Yields items from a CSV manifest with columns path,title[,expiry_date].
+    Relative paths are resolved against the manifest's directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline="") as manifest:
+        for row in csv.DictReader(manifest):
+            path = row["path"] if os.path.isabs(row["path"]) else os.path.join(base_dir, row["path"])
+            yield ImportItem(
+                path=path,
+                title=row.get("title") or os.path.splitext(os.path.basename(path))[0],
+                expiry_date=row.get("expiry_date") or None
+            )
+
+class BulkImporter:
+    def __init__(
+        self,
+        supabase_client: Client,
+        created_by: str,
+        checkpoint_path: str,
+        contract_status: str = "Signed",
+        batch_size: int = 50,
+        upload_concurrency: int = 8,
+        lane: str = "bulk",
+        on_progress: Optional[Callable[[Dict], None]] = None
+    ):
+        self.supabase = supabase_client
+        self.created_by = created_by
+        self.checkpoint_path = checkpoint_path
+        self.contract_status = contract_status
+        self.version_status = "Signed" if contract_status == "Signed" else "Draft"
+        self.batch_size = batch_size
+        self.upload_concurrency = upload_concurrency
+        self.lane = lane
+        self.on_progress = on_progress
+        self.checkpoint = self._load_checkpoint()
+
+    def _load_checkpoint(self) -> Dict:
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        return {"done": {}, "failed": {}}
+
+    def _save_checkpoint(self) -> None:
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _upload(self, contract_id: str, item: ImportItem) -> Dict:
+        """
+        Streams one PDF to storage and returns its public URL and page count.
+        """
+        with fitz.open(item.path) as doc:
+            page_count = doc.page_count
+        file_path = f"{contract_id}/v1.pdf"
+        # Passing the path lets the storage client stream the file instead of loading it
+        self.supabase.storage.from_("contracts").upload(
+            path=file_path,
+            file=item.path,
+            file_options={"content-type": "application/pdf"}
+        )
+        return {
+            "file_url": self.supabase.storage.from_("contracts").get_public_url(file_path),
+            "pages": page_count
+        }
+
+    def _rollback(self, contract_ids: List[str]) -> None:
+        """
+        Deletes contracts created by a batch that could not be imported, with their
+        participants, versions and uploaded files, so a resumed run starts clean.
+        """
+        if not contract_ids:
+            return
+        try:
+            self.supabase.table("contract_versions").delete().in_("contract_id", contract_ids).execute()
+            self.supabase.table("contract_participants").delete().in_("contract_id", contract_ids).execute()
+            self.supabase.table("contracts").delete().in_("id", contract_ids).execute()
+            self.supabase.storage.from_("contracts").remove([f"{contract_id}/v1.pdf" for contract_id in contract_ids])
+        except Exception as e:
+            logger.error(f"Rollback of contracts {contract_ids} failed: {e}")
+
+    def _mark_failed(self, items: List[ImportItem], error: Exception, stats: Dict) -> None:
+        for item in items:
+            self.checkpoint["failed"][item.path] = str(error)
+            stats["failed"] += 1
+
+    async def _import_batch(self, batch: List[ImportItem], stats: Dict) -> None:
+        # 1. Contracts and their CM participants, one insert each for the whole batch
+        try:
+            contracts = (await asyncio.to_thread(lambda: self.supabase.table("contracts").insert([
+                {
+                    "title": item.title,
+                    "status": self.contract_status,
+                    "expiry_date": item.expiry_date,
+                    "created_by": self.created_by
+                }
+                for item in batch
+            ]).execute())).data
+        except Exception as e:
+            logger.error(f"Contract insert failed for batch of {len(batch)}: {e}")
+            self._mark_failed(batch, e, stats)
+            return
+        try:
+            await asyncio.to_thread(lambda: self.supabase.table("contract_participants").insert([
+                {
+                    "contract_id": contract["id"],
+                    "user_id": self.created_by,
+                    "role": "CM",
+                    "signing_order": 1,
+                    "status": "Signed" if self.contract_status == "Signed" else "Invited"
+                }
+                for contract in contracts
+            ]).execute())
+        except Exception as e:
+            logger.error(f"Participant insert failed for batch of {len(batch)}: {e}")
+            await asyncio.to_thread(self._rollback, [contract["id"] for contract in contracts])
+            self._mark_failed(batch, e, stats)
+            return
+
+        # 2. Upload the PDFs with bounded parallelism
+        semaphore = asyncio.Semaphore(self.upload_concurrency)
+
+        async def _upload_one(contract: Dict, item: ImportItem) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(self._upload, contract["id"], item)
+                except Exception as e:
+                    logger.error(f"Upload failed for {item.path}: {e}")
+                    self._mark_failed([item], e, stats)
+                    return None
+
+        uploads = await asyncio.gather(*(_upload_one(c, i) for c, i in zip(contracts, batch)))
+        orphaned = [contract["id"] for contract, upload in zip(contracts, uploads) if upload is None]
+        if orphaned:
+            await asyncio.to_thread(self._rollback, orphaned)
+
+        # 3. Versions for the uploaded files
+        imported = [(c, i, u) for c, i, u in zip(contracts, batch, uploads) if u is not None]
+        if not imported:
+            return
+        try:
+            versions = (await asyncio.to_thread(lambda: self.supabase.table("contract_versions").insert([
+                {
+                    "contract_id": contract["id"],
+                    "version_num": 1,
+                    "file_url": upload["file_url"],
+                    "status": self.version_status
+                }
+                for contract, _, upload in imported
+            ]).execute())).data
+        except Exception as e:
+            logger.error(f"Version insert failed for batch of {len(imported)}: {e}")
+            await asyncio.to_thread(self._rollback, [contract["id"] for contract, _, _ in imported])
+            self._mark_failed([item for _, item, _ in imported], e, stats)
+            return
+
+        # 4. Hand each version to the AI pipeline, checkpointing it as soon as it is queued
+        for version, (contract, item, upload) in zip(versions, imported):
+            try:
+                await asyncio.to_thread(start_version_workflow, contract["id"], version["id"], upload["file_url"], lane=self.lane)
+            except Exception as e:
+                logger.error(f"Workflow start failed for {item.path}: {e}")
+                await asyncio.to_thread(self._rollback, [contract["id"]])
+                self._mark_failed([item], e, stats)
+                continue
+            self.checkpoint["done"][item.path] = contract["id"]
+            self.checkpoint["failed"].pop(item.path, None)
+            self._save_checkpoint()
+            stats["imported"] += 1
+            stats["pages"] += upload["pages"]
+
+    async def run(self, items: Iterator[ImportItem]) -> Dict:
+        """
+        Imports items not already in the checkpoint and returns throughput statistics.
+        Items of a batch that fails part-way are rolled back and retried on the next run.
+        """
+        stats = {"imported": 0, "skipped": 0, "failed": 0, "pages": 0}
+        started = time.monotonic()
+
+        def _report() -> Dict:
+            elapsed = time.monotonic() - started
+            report = {
+                **stats,
+                "elapsed_seconds": round(elapsed, 1),
+                "docs_per_sec": round(stats["imported"] / elapsed, 2) if elapsed else 0.0,
+                "pages_per_sec": round(stats["pages"] / elapsed, 2) if elapsed else 0.0
+            }
+            if self.on_progress:
+                self.on_progress(report)
+            return report
+
+        batch: List[ImportItem] = []
+        for item in items:
+            if item.path in self.checkpoint["done"]:
+                stats["skipped"] += 1
+                continue
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                await self._import_batch(batch, stats)
+                self._save_checkpoint()
+                logger.info(f"Bulk import progress: {_report()}")
+                batch = []
+        if batch:
+            await self._import_batch(batch, stats)
+            self._save_checkpoint()
+        return _report()
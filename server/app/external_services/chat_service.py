@@ -1,15 +1,21 @@
 """
 Service for contract Q&A using RAG (Retrieval Augmented Generation).
 """
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from langchain_openai import ChatOpenAI
 from langchain_openai import OpenAIEmbeddings
 from langchain.schema import HumanMessage
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
 import logging
+from supabase import Client
 from server.app.core.supabase_client import supabase
+from server.app.core.rate_limiter import ainvoke_limited, astream_limited, aembed_query_limited
+from server.app.core.answer_cache import AnswerCache, answer_cache
+from server.app.core.embedding_state import get_embeddings_generation
+from server.app.external_services.retrieval import HybridRetriever, RetrievalOptions
 
 # Load environment variables
 load_dotenv()
@@ -17,74 +23,157 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+NO_CONTEXT_ANSWER = "I couldn't find relevant information in the contract to answer your question."
+ERROR_ANSWER = "Sorry, I encountered an error while processing your question. Please try again."
+
 class ChatService:
-    def __init__(self):
+    def __init__(
+        self,
+        llm: Optional[ChatOpenAI] = None,
+        embeddings: Optional[OpenAIEmbeddings] = None,
+        supabase_client: Optional[Client] = None,
+        cache: Optional[AnswerCache] = None,
+        retriever: Optional[HybridRetriever] = None
+    ):
         try:
             if not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OPENAI_API_KEY not found in environment")
-            self.llm = ChatOpenAI(
+            self.llm = llm or ChatOpenAI(
                 model="gpt-3.5-turbo",
                 temperature=0.2
             )
-            self.embeddings = OpenAIEmbeddings(
+            self.embeddings = embeddings or OpenAIEmbeddings(
                 model="text-embedding-3-small"
             )
+            self.supabase = supabase_client or supabase
+            self.cache = cache or answer_cache
+            self.retriever = retriever or HybridRetriever(supabase_client=self.supabase)
         except Exception as e:
             logger.error(f"Failed to initialize ChatService: {e}")
             raise e
 
-    async def get_answer(self, contract_id: str, version_id: str, question: str) -> Dict:
+    async def _retrieve(self, version_id: str, question: str, options: RetrievalOptions) -> Dict:
+        """
+        Resolves a question to either a cached answer ({"cached": {...}}) or the
+        retrieval state needed to answer it (generation, question embedding, chunks).
+        """
+        # Answers retrieved with non-default options are cached separately
+        scope = version_id if options == RetrievalOptions() else f"{version_id}:{options.signature()}"
+
+        # Exact repeat of a question already answered for this set of embeddings
+        # The cache and generation lookups are blocking Redis calls; keep them off the event loop
+        generation = await asyncio.to_thread(get_embeddings_generation, version_id)
+        if generation >= 0:
+            cached = await asyncio.to_thread(self.cache.get_exact, scope, generation, question)
+            if cached is not None:
+                return {"cached": cached}
+
+        # Generate question embedding
+        question_embedding = await aembed_query_limited(self.embeddings, question)
+
+        # Near-duplicate of a question already answered
+        if generation >= 0:
+            cached = await asyncio.to_thread(self.cache.get_similar, scope, generation, question_embedding)
+            if cached is not None:
+                return {"cached": cached}
+
+        # Find relevant chunks (vector, lexical or both, per options)
+        chunks, timings = await self.retriever.retrieve(version_id, generation, question, question_embedding, options)
+        return {
+            "cached": None,
+            "scope": scope,
+            "generation": generation,
+            "question_embedding": question_embedding,
+            "chunks": chunks,
+            "timings": timings
+        }
+
+    def _citations(self, chunks: List[Dict]) -> List[Dict]:
+        return [
+            {
+                "text": chunk["text"],
+                "page": chunk["page_num"]
+            } for chunk in chunks
+        ]
+
+    def _messages(self, question: str, chunks: List[Dict]) -> List[HumanMessage]:
+        context = "\n\n".join([chunk["text"] for chunk in chunks])
+        return [HumanMessage(content=self._build_prompt(question, context))]
+
+    async def _remember(self, question: str, retrieval: Dict, result: Dict) -> None:
+        if retrieval["generation"] >= 0:
+            await asyncio.to_thread(
+                self.cache.set, retrieval["scope"], retrieval["generation"], question, retrieval["question_embedding"], result
+            )
+
+    async def get_answer(self, contract_id: str, version_id: str, question: str, options: Optional[RetrievalOptions] = None) -> Dict:
         """
         Get answer for a question about a specific contract version.
+        Repeated and near-duplicate questions are answered from the answer cache.
         """
         try:
-            # Generate question embedding
-            question_embedding = await self.embeddings.aembed_query(question)
-            
-            # Find relevant chunks using vector similarity
-            chunks = supabase.rpc(
-                'match_chunks',
-                {
-                    'query_embedding': question_embedding,
-                    'match_count': 3,
-                    'contract_version_id': version_id
-                }
-            ).execute()
-            
-            if not chunks.data:
+            retrieval = await self._retrieve(version_id, question, options or RetrievalOptions())
+            if retrieval["cached"] is not None:
+                return retrieval["cached"]
+
+            if not retrieval["chunks"]:
                 return {
-                    "answer": "I couldn't find relevant information in the contract to answer your question.",
+                    "answer": NO_CONTEXT_ANSWER,
                     "citations": []
                 }
-            
-            # Build context from chunks
-            context = "\n\n".join([chunk["text"] for chunk in chunks.data])
-            citations = [
-                {
-                    "text": chunk["text"],
-                    "page": chunk["page_num"]
-                } for chunk in chunks.data
-            ]
-            
+
             # Get answer from GPT
-            messages = [
-                HumanMessage(content=self._build_prompt(question, context))
-            ]
-            response = await self.llm.ainvoke(messages)
-            
-            # Return result directly without storing
-            return {
+            response = await ainvoke_limited(self.llm, self._messages(question, retrieval["chunks"]))
+
+            result = {
                 "answer": response.content,
-                "citations": citations
+                "citations": self._citations(retrieval["chunks"])
             }
-            
+            await self._remember(question, retrieval, result)
+            return result
+
         except Exception as e:
             logger.error(f"Failed to get answer: {e}")
             return {
-                "answer": "Sorry, I encountered an error while processing your question. Please try again.",
+                "answer": ERROR_ANSWER,
                 "citations": []
             }
 
+    async def stream_answer(self, contract_id: str, version_id: str, question: str, options: Optional[RetrievalOptions] = None) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of get_answer. Yields {"type": "citations", "citations": [...]}
+        as soon as retrieval finishes, then {"type": "token", "text": "..."} for each piece
+        of the answer, then {"type": "done"} (or {"type": "error", "message": "..."}).
+        """
+        try:
+            retrieval = await self._retrieve(version_id, question, options or RetrievalOptions())
+            if retrieval["cached"] is not None:
+                yield {"type": "citations", "citations": retrieval["cached"]["citations"]}
+                yield {"type": "token", "text": retrieval["cached"]["answer"]}
+                yield {"type": "done"}
+                return
+
+            if not retrieval["chunks"]:
+                yield {"type": "citations", "citations": []}
+                yield {"type": "token", "text": NO_CONTEXT_ANSWER}
+                yield {"type": "done"}
+                return
+
+            citations = self._citations(retrieval["chunks"])
+            yield {"type": "citations", "citations": citations}
+
+            parts = []
+            async for text in astream_limited(self.llm, self._messages(question, retrieval["chunks"])):
+                parts.append(text)
+                yield {"type": "token", "text": text}
+
+            await self._remember(question, retrieval, {"answer": "".join(parts), "citations": citations})
+            yield {"type": "done"}
+
+        except Exception as e:
+            logger.error(f"Failed to stream answer: {e}")
+            yield {"type": "error", "message": ERROR_ANSWER}
+
     def _build_prompt(self, question: str, context: str) -> str:
         """
         Build prompt for GPT with question and context.
@@ -4,26 +4,31 @@ Service for extracting clauses from contract text using GPT.
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from typing import Dict, List, Optional
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
 import openai
+from server.app.core.cache import llm_cache, llm_cache_key, prompt_version
+from server.app.external_services.page_windows import build_page_windows, map_windows, merge_unique
+from server.app.core.rate_limiter import ainvoke_limited
 
 # Load environment variables
 load_dotenv()
 
 class ClauseExtractor:
-    def __init__(self):
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
         print("[DEBUG] Initializing ClauseExtractor")
         try:
             print("[DEBUG] Setting up ChatOpenAI...")
             if not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OPENAI_API_KEY not found in environment")
                 
-            self.llm = ChatOpenAI(
+            self.llm = llm or ChatOpenAI(
                 model="gpt-4.1",
                 temperature=0.2
             )
+            self.prompt_version = prompt_version(self._build_extraction_prompt(""))
             print("[DEBUG] ChatOpenAI initialized successfully")
         except Exception as e:
             print(f"[ERROR] Failed to initialize ChatOpenAI: {str(e)}")
@@ -33,31 +38,49 @@ class ClauseExtractor:
         """
         Extracts key clauses from contract text using GPT.
         Returns a dictionary of clause types and their content.
+        Results are cached per (model, prompt version, text) so unchanged documents skip the LLM.
         """
+        cache_key = llm_cache_key(self.llm.model_name, self.prompt_version, text)
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            print("[DEBUG] Using cached clause extraction result")
+            return cached
         try:
             prompt = self._build_extraction_prompt(text)
             messages = [HumanMessage(content=prompt)]
-            response = await self.llm.ainvoke(messages)
+            response = await ainvoke_limited(self.llm, messages)
             try:
-                clauses = self._parse_gpt_response(response.content)
+                clauses = self.parse_gpt_response(response.content)
                 # Only log the final parsed JSON output once
                 print(f"[INFO] Final clause extraction JSON output: {json.dumps(clauses, indent=2)}")
+                await asyncio.to_thread(llm_cache.set, cache_key, clauses)
                 return clauses
             except Exception as e:
                 raise e
         except Exception as e:
             raise e
 
-    def _build_extraction_prompt(self, text: str) -> str:
+    async def extract_clauses_from_pages(self, pages: List[Dict]) -> Dict:
         """
-        Builds the prompt for GPT to extract clauses.
+        Extracts clauses from extracted PDF pages. Long documents are split into
+        page-aligned windows that are extracted concurrently, then merged and deduplicated.
         """
-        print("[DEBUG] Building extraction prompt")
-        prompt = f"""You are a legal document analyzer. Extract key clauses from the following contract text.
+        windows = build_page_windows(pages)
+        if len(windows) == 1:
+            return await self.extract_clauses(windows[0])
+        print(f"[DEBUG] Extracting clauses from {len(windows)} page windows")
+        results = await map_windows(windows, self.extract_clauses)
+        clauses = [clause for result in results for clause in result["clauses"]]
+        return {"clauses": merge_unique(clauses, text_key="text", group_key="type")}
 
-For each clause found, you must provide:
+    def task_instructions(self) -> str:
+        """
+        Returns the clause extraction instructions, without the contract text.
+        Shared with ContractAnalyzer, which sends them after a common contract prefix.
+        """
+        return """For each clause found, you must provide:
 1. The exact text of the clause
-2. The page number where it appears (estimate based on text position)
+2. The page number where it appears (from the nearest [Page N] marker before it)
 3. A confidence score between 0 and 1
 
 Key clauses to look for:
@@ -67,24 +90,33 @@ Key clauses to look for:
 - Confidentiality
 
 You must return the results in this exact JSON format:
-{{
+{
     "clauses": [
-        {{
+        {
             "type": "clause_type",
             "text": "exact_clause_text",
             "page": page_number,
             "confidence": confidence_score
-        }}
+        }
     ]
-}}
+}
+"""
+
+    def _build_extraction_prompt(self, text: str) -> str:
+        """
+        Builds the prompt for GPT to extract clauses.
+        """
+        print("[DEBUG] Building extraction prompt")
+        prompt = f"""You are a legal document analyzer. Extract key clauses from the following contract text.
 
+{self.task_instructions()}
 Contract text:
 {text}
 """
         print("[DEBUG] Prompt built successfully")
         return prompt
 
-    def _parse_gpt_response(self, response: str) -> Dict:
+    def parse_gpt_response(self, response: str) -> Dict:
         """
         Parses GPT's response into a structured format.
         """
@@ -0,0 +1,99 @@
+"""
+Fused clause extraction and risk assessment over a shared document prefix.
+
+Both analyses send the same contract text to the same model. Here every window is sent
+as an identical leading [system, contract text] prefix followed by the task-specific
+instructions, and the risk call is made after the clause call for the same window, so
+the provider's prompt-prefix cache serves the contract tokens of the second call.
+"""
+from langchain_openai import ChatOpenAI
+from langchain.schema import HumanMessage, SystemMessage
+from typing import Callable, Dict, List, Optional
+import asyncio
+import os
+from dotenv import load_dotenv
+from server.app.core.cache import llm_cache, llm_cache_key, prompt_version
+from server.app.external_services.clause_extractor import ClauseExtractor
+from server.app.external_services.risk_extractor import RiskExtractor
+from server.app.external_services.page_windows import build_page_windows, map_windows, merge_unique
+from server.app.core.rate_limiter import ainvoke_limited
+
+# Load environment variables
+load_dotenv()
+
+# "fused" runs both analyses in one task over a shared prefix; "separate" keeps one task each
+AI_ANALYSIS_MODE = os.getenv("AI_ANALYSIS_MODE", "fused")
+
+DOCUMENT_SYSTEM_PROMPT = """You are a legal contract analyst. The next message contains the full text of a contract, with a [Page N] marker at the start of each page. The message after it tells you which analysis to perform on that contract. Follow its output format exactly."""
+
+CLAUSE_TASK_HEADER = "Extract key clauses from the contract text above."
+RISK_TASK_HEADER = "Review the contract text above and identify all passages that may present legal, financial, or compliance risks."
+
+class ContractAnalyzer:
+    def __init__(
+        self,
+        clause_extractor: ClauseExtractor,
+        risk_extractor: RiskExtractor,
+        llm: Optional[ChatOpenAI] = None
+    ):
+        print("[DEBUG] Initializing ContractAnalyzer")
+        self.clause_extractor = clause_extractor
+        self.risk_extractor = risk_extractor
+        self.llm = llm or clause_extractor.llm
+        self.clause_instructions = f"{CLAUSE_TASK_HEADER}\n\n{clause_extractor.task_instructions()}"
+        self.risk_instructions = f"{RISK_TASK_HEADER}\n\n{risk_extractor.task_instructions()}"
+        self.clause_prompt_version = prompt_version(DOCUMENT_SYSTEM_PROMPT + self.clause_instructions)
+        self.risk_prompt_version = prompt_version(DOCUMENT_SYSTEM_PROMPT + self.risk_instructions)
+
+    def _document_prefix(self, text: str) -> List:
+        """
+        The leading messages shared, byte for byte, by every analysis of this text.
+        """
+        return [
+            SystemMessage(content=DOCUMENT_SYSTEM_PROMPT),
+            HumanMessage(content=f"Contract text:\n{text}")
+        ]
+
+    async def _run_task(self, text: str, instructions: str, version: str, parse: Callable[[str], Dict]) -> Dict:
+        cache_key = llm_cache_key(self.llm.model_name, version, text)
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            print("[DEBUG] Using cached fused analysis result")
+            return cached
+        messages = self._document_prefix(text) + [HumanMessage(content=instructions)]
+        response = await ainvoke_limited(self.llm, messages)
+        result = parse(response.content)
+        await asyncio.to_thread(llm_cache.set, cache_key, result)
+        return result
+
+    async def analyze_window(self, text: str) -> Dict:
+        """
+        Runs clause extraction then risk assessment on one window of contract text.
+        The calls are sequential so the second one can hit the cached prefix.
+        """
+        clauses = await self._run_task(
+            text, self.clause_instructions, self.clause_prompt_version, self.clause_extractor.parse_gpt_response
+        )
+        risks = await self._run_task(
+            text, self.risk_instructions, self.risk_prompt_version, self.risk_extractor.parse_gpt_response
+        )
+        return {"clauses": clauses, "risks": risks}
+
+    async def analyze_pages(self, pages: List[Dict]) -> Dict:
+        """
+        Returns {"clauses": {"clauses": [...]}, "risks": {"risks": [...]}} for extracted
+        PDF pages. Windows of a long document are analyzed concurrently, then merged.
+        """
+        windows = build_page_windows(pages)
+        if len(windows) == 1:
+            return await self.analyze_window(windows[0])
+        print(f"[DEBUG] Running fused analysis over {len(windows)} page windows")
+        results = await map_windows(windows, self.analyze_window)
+        clauses = [clause for result in results for clause in result["clauses"]["clauses"]]
+        risks = [risk for result in results for risk in result["risks"]["risks"]]
+        analysis = {
+            "clauses": {"clauses": merge_unique(clauses, text_key="text", group_key="type")},
+            "risks": {"risks": merge_unique(risks, text_key="risky_text")}
+        }
+        print(f"[INFO] Fused analysis found {len(analysis['clauses']['clauses'])} clauses and {len(analysis['risks']['risks'])} risks")
+        return analysis
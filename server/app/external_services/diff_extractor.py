@@ -3,12 +3,17 @@ Service for extracting and summarizing differences between contract versions usi
 """
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
-from typing import Dict
+from typing import Dict, List, Optional
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
+from supabase import Client
 from server.app.core.supabase_client import supabase
 from server.app.external_services.pdf_processor import PDFProcessor
+from server.app.core.cache import llm_cache, llm_cache_key, prompt_version
+from server.app.external_services.text_diff import compute_hunks
+from server.app.core.rate_limiter import ainvoke_limited
 import logging
 
 # Load environment variables
@@ -17,22 +22,36 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Unchanged segments sent around each change so the LLM can tell which clause it belongs to
+DIFF_CONTEXT_SEGMENTS = int(os.getenv("DIFF_CONTEXT_SEGMENTS", 1))
+
 class DiffExtractor:
-    def __init__(self):
+    def __init__(
+        self,
+        llm: Optional[ChatOpenAI] = None,
+        supabase_client: Optional[Client] = None,
+        pdf_processor: Optional[PDFProcessor] = None
+    ):
         try:
             if not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OPENAI_API_KEY not found in environment")
-            self.llm = ChatOpenAI(
+            self.llm = llm or ChatOpenAI(
                 model="gpt-4.1",
                 temperature=0.2
             )
+            self.supabase = supabase_client or supabase
+            self.pdf_processor = pdf_processor or PDFProcessor(supabase_client=self.supabase)
+            self.prompt_version = prompt_version(self._build_diff_prompt([]))
         except Exception as e:
             raise e
 
-    async def extract_diff(self, contract_id: str, version_id: str, prev_file_url: str, curr_file_url: str):
+    async def extract_diff(self, contract_id: str, version_id: str, prev_file_url: str, curr_file_url: str, prev_version_id: Optional[str] = None):
         """
         Summarizes the major and minor changes between two contract versions using GPT.
-        Returns a dictionary with a summary and a list of highlighted changes.
+        Returns a dictionary with a summary and a list of highlighted changes, or None on failure.
+        Page text already extracted by the ingestion stage is reused for both versions.
+        The versions are diffed locally first: identical texts skip the LLM, and otherwise
+        only the changed passages with minimal context are sent for summarization.
         """
         if prev_file_url.strip() == curr_file_url.strip():
             result = {
@@ -41,47 +60,59 @@ class DiffExtractor:
             }
             return result
         try:
-            pdf_processor = PDFProcessor(supabase_client=supabase)
-            prev_text = await pdf_processor.extract_text(prev_file_url)
-            curr_text = await pdf_processor.extract_text(curr_file_url)
+            pdf_processor = self.pdf_processor
+            if prev_version_id:
+                prev_text = await pdf_processor.get_version_text(prev_version_id, prev_file_url)
+            else:
+                prev_text = await pdf_processor.extract_text(prev_file_url)
+            curr_text = await pdf_processor.get_version_text(version_id, curr_file_url)
             if prev_text is None or curr_text is None:
                 logger.error(f"Failed to extract text from one or both PDFs for contract {contract_id}, version {version_id}")
                 return
-            # Call LLM for diff summary
-            try:
-                diff_summary = await self._call_llm_for_diff_summary(prev_text, curr_text)
-            except Exception as llm_exc:
-                logger.error(f"LLM diff summary failed for contract {contract_id}, version {version_id}: {llm_exc}")
-                return  # Only diff result is missing; do not raise
-            # Store result in ai_tasks
-            try:
-                result = supabase.table("ai_tasks").upsert({
-                    "contract_id": contract_id,
-                    "version_id": version_id,
-                    "type": "Diff",
-                    "status": "Completed",
-                    "result": diff_summary,
-                }, on_conflict="contract_id,version_id,type").execute()
-                return diff_summary
-            except Exception as db_exc:
-                logger.error(f"DB insert failed for diff result (contract {contract_id}, version {version_id}): {db_exc}")
-                raise db_exc
+            # SequenceMatcher is CPU-bound (quadratic on long contracts); keep it off the event loop
+            hunks = await asyncio.to_thread(compute_hunks, prev_text, curr_text, context=DIFF_CONTEXT_SEGMENTS)
+            if not hunks:
+                diff_summary = {
+                    "summary": "No changes detected between this version and the previous version.",
+                    "diffs": []
+                }
+            else:
+                logger.info(f"Local diff found {len(hunks)} changed passages for contract {contract_id}, version {version_id}")
+                # Call LLM for diff summary of the changed passages only
+                try:
+                    diff_summary = await self._call_llm_for_diff_summary(hunks)
+                except Exception as llm_exc:
+                    logger.error(f"LLM diff summary failed for contract {contract_id}, version {version_id}: {llm_exc}")
+                    return  # Only diff result is missing; do not raise
+            return diff_summary
         except Exception as e:
             logger.error(f"Unexpected error in diff extraction: {e}")
             return
 
-    async def _call_llm_for_diff_summary(self, prev_text: str, curr_text: str):
-        prompt = self._build_diff_prompt(prev_text, curr_text)
+    async def _call_llm_for_diff_summary(self, hunks: List[Dict]):
+        cache_key = llm_cache_key(self.llm.model_name, self.prompt_version, json.dumps(hunks, sort_keys=True))
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            logger.info("Using cached diff summary")
+            return cached
+        prompt = self._build_diff_prompt(hunks)
         messages = [HumanMessage(content=prompt)]
-        response = await self.llm.ainvoke(messages)
+        response = await ainvoke_limited(self.llm, messages)
         try:
-            return self._parse_gpt_response(response.content)
+            diff_summary = self._parse_gpt_response(response.content)
+            await asyncio.to_thread(llm_cache.set, cache_key, diff_summary)
+            return diff_summary
         except Exception as e:
             logger.error(f"Failed to parse LLM response: {e}")
             raise e
 
-    def _build_diff_prompt(self, prev_text: str, curr_text: str) -> str:
-        prompt = f"""You are a contract analyst. Compare the following two versions of a contract. List the most significant changes first (e.g., changes to payment terms, liability, termination, etc.), then mention any minor changes only if they could affect the contract's meaning. Ignore purely cosmetic edits.\n\nReturn the results in this exact JSON format:\n{{\n  \"summary\": \"...\",\n  \"diffs\": [\n    {{\n      \"section\": \"...\",\n      \"old\": \"...\",\n      \"new\": \"...\"\n    }}\n  ]\n}}\n\nPrevious version:\n{prev_text}\n\nCurrent version:\n{curr_text}\n"""
+    def _build_diff_prompt(self, hunks: List[Dict]) -> str:
+        changes = "\n\n".join(
+            f"Change {i}:\nContext before: {hunk['context_before']}\nPrevious: {hunk['old'] or '(none - added)'}\n"
+            f"Current: {hunk['new'] or '(none - removed)'}\nContext after: {hunk['context_after']}"
+            for i, hunk in enumerate(hunks, start=1)
+        )
+        prompt = f"""You are a contract analyst. Below are the passages that changed between two versions of a contract, each with a little surrounding context from the current version. List the most significant changes first (e.g., changes to payment terms, liability, termination, etc.), then mention any minor changes only if they could affect the contract's meaning. Ignore purely cosmetic edits.\n\nReturn the results in this exact JSON format:\n{{\n  \"summary\": \"...\",\n  \"diffs\": [\n    {{\n      \"section\": \"...\",\n      \"old\": \"...\",\n      \"new\": \"...\"\n    }}\n  ]\n}}\n\nChanged passages:\n{changes}\n"""
         return prompt
 
     def _parse_gpt_response(self, response: str) -> Dict:
@@ -1,14 +1,20 @@
 """
 Service for generating and storing embeddings from contract text.
 """
-from typing import List, Dict
+from typing import Any, Dict, List, Optional
+import asyncio
+import hashlib
 import openai
 from langchain_openai import OpenAIEmbeddings
 import os
 from dotenv import load_dotenv
 import logging
 import tiktoken
+from supabase import Client
 from server.app.core.supabase_client import supabase
+from server.app.external_services.text_chunker import TextChunker
+from server.app.core.rate_limiter import aembed_documents_limited
+from server.app.core.embedding_state import bump_embeddings_generation
 
 # Load environment variables
 load_dotenv()
@@ -16,80 +22,159 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+EMBEDDING_CHUNK_TOKENS = int(os.getenv("EMBEDDING_CHUNK_TOKENS", 400))
+EMBEDDING_CHUNK_OVERLAP_TOKENS = int(os.getenv("EMBEDDING_CHUNK_OVERLAP_TOKENS", 50))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_MAX_PARALLEL_BATCHES = int(os.getenv("EMBEDDING_MAX_PARALLEL_BATCHES", 4))
+EMBEDDING_INSERT_BATCH_SIZE = int(os.getenv("EMBEDDING_INSERT_BATCH_SIZE", 100))
+EMBEDDING_REUSE_FETCH_SIZE = int(os.getenv("EMBEDDING_REUSE_FETCH_SIZE", 50))
+
 class EmbeddingGenerator:
-    def __init__(self):
+    def __init__(
+        self,
+        embeddings: Optional[OpenAIEmbeddings] = None,
+        tokenizer: Optional[tiktoken.Encoding] = None,
+        supabase_client: Optional[Client] = None
+    ):
         try:
             if not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OPENAI_API_KEY not found in environment")
-            self.embeddings = OpenAIEmbeddings(
+            self.embeddings = embeddings or OpenAIEmbeddings(
                 model="text-embedding-3-small"
             )
-            self.tokenizer = tiktoken.get_encoding("cl100k_base")
+            self.tokenizer = tokenizer or tiktoken.get_encoding("cl100k_base")
+            self.supabase = supabase_client or supabase
+            self.chunker = TextChunker(
+                self.tokenizer,
+                max_tokens=EMBEDDING_CHUNK_TOKENS,
+                overlap_tokens=EMBEDDING_CHUNK_OVERLAP_TOKENS
+            )
         except Exception as e:
             logger.error(f"Failed to initialize EmbeddingGenerator: {e}")
             raise e
 
-    def _chunk_text(self, text: str, chunk_size: int = 500) -> List[Dict]:
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds texts in batches of EMBEDDING_BATCH_SIZE, running at most
+        EMBEDDING_MAX_PARALLEL_BATCHES requests at once. Output order matches input order.
+        """
+        semaphore = asyncio.Semaphore(EMBEDDING_MAX_PARALLEL_BATCHES)
+
+        async def _embed_batch(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await aembed_documents_limited(self.embeddings, batch)
+
+        batches = [texts[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), EMBEDDING_BATCH_SIZE)]
+        results = await asyncio.gather(*(_embed_batch(batch) for batch in batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def _store_rows(self, version_id: str, rows: List[Dict]) -> None:
+        """
+        Writes a version's embedding rows with multi-row upserts on (version_id, chunk_id),
+        then deletes chunks left over from an earlier run that produced more chunks.
+        Re-running for the same version therefore never duplicates chunk_ids.
+        """
+        for i in range(0, len(rows), EMBEDDING_INSERT_BATCH_SIZE):
+            self.supabase.table("embeddings").upsert(
+                rows[i:i + EMBEDDING_INSERT_BATCH_SIZE],
+                on_conflict="version_id,chunk_id"
+            ).execute()
+
+        current_ids = {row["chunk_id"] for row in rows}
+        existing = self.supabase.table("embeddings").select("chunk_id").eq("version_id", version_id).execute()
+        stale_ids = [row["chunk_id"] for row in existing.data or [] if row["chunk_id"] not in current_ids]
+        if stale_ids:
+            self.supabase.table("embeddings").delete().eq("version_id", version_id).in_("chunk_id", stale_ids).execute()
+
+    def _content_hash(self, text: str) -> str:
         """
-        Split text into chunks with page tracking.
+        Hash identifying a chunk's embedding: same model and same text give the same vector.
         """
-        chunks = []
-        current_chunk = ""
-        current_length = 0
-        
-        # Estimate page numbers (rough heuristic)
-        chars_per_page = 3000
-        
-        for i, char in enumerate(text):
-            current_chunk += char
-            current_length += 1
-            
-            if current_length >= chunk_size and char in '.!?':
-                page_num = (i // chars_per_page) + 1
-                chunks.append({
-                    "text": current_chunk.strip(),
-                    "page": page_num
-                })
-                current_chunk = ""
-                current_length = 0
-        
-        if current_chunk:
-            page_num = (len(text) // chars_per_page) + 1
-            chunks.append({
-                "text": current_chunk.strip(),
-                "page": page_num
-            })
-        
-        return chunks
-
-    async def generate_and_store(self, contract_id: str, version_id: str, text: str) -> bool:
+        return hashlib.sha256(f"{self.embeddings.model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _previous_version_id(self, contract_id: str, version_id: str) -> Optional[str]:
+        """
+        Returns the id of the version that precedes version_id, if any.
+        """
+        current = self.supabase.table("contract_versions").select("version_num").eq("id", version_id).single().execute()
+        if not current.data:
+            return None
+        previous = self.supabase.table("contract_versions").select("id").eq("contract_id", contract_id).lt(
+            "version_num", current.data["version_num"]
+        ).order("version_num", desc=True).limit(1).execute()
+        return previous.data[0]["id"] if previous.data else None
+
+    def _reusable_vectors(self, prev_version_id: str, hashes: List[str]) -> Dict[str, Any]:
+        """
+        Returns {content_hash: embedding} for chunks of the previous version whose hash
+        matches one of hashes.
         """
-        Generate embeddings for text chunks and store in Supabase.
+        existing = self.supabase.table("embeddings").select("content_hash").eq("version_id", prev_version_id).execute()
+        wanted = set(hashes)
+        matching = list({row["content_hash"] for row in existing.data or [] if row["content_hash"] in wanted})
+        vectors = {}
+        for i in range(0, len(matching), EMBEDDING_REUSE_FETCH_SIZE):
+            rows = self.supabase.table("embeddings").select("content_hash, embedding").eq(
+                "version_id", prev_version_id
+            ).in_("content_hash", matching[i:i + EMBEDDING_REUSE_FETCH_SIZE]).execute()
+            for row in rows.data or []:
+                vectors[row["content_hash"]] = row["embedding"]
+        return vectors
+
+    async def generate_and_store(self, contract_id: str, version_id: str, pages: List[Dict], prev_version_id: Optional[str] = None) -> bool:
+        """
+        Generate embeddings for page-aware text chunks and store in Supabase.
+        Chunks whose content is unchanged since the previous version reuse that version's
+        vectors; only new or changed chunks are sent to the embedding API.
         """
         try:
-            # Split text into chunks
-            chunks = self._chunk_text(text)
-            
-            for i, chunk in enumerate(chunks):
-                # Generate embedding
-                embedding = await self.embeddings.aembed_query(chunk["text"])
-                
-                # Store in Supabase
-                chunk_id = f"chunk_{i+1}"
+            # Split pages into token-bounded chunks that keep their page numbers
+            chunks = await asyncio.to_thread(self.chunker.chunk_pages, pages)
+            if not chunks:
+                logger.error(f"No text to embed for version {version_id}")
+                return False
+            hashes = await asyncio.to_thread(lambda: [self._content_hash(chunk["text"]) for chunk in chunks])
+
+            # Reuse vectors of unchanged chunks from the previous version
+            if prev_version_id is None:
+                prev_version_id = await asyncio.to_thread(self._previous_version_id, contract_id, version_id)
+            vectors: Dict[str, Any] = {}
+            if prev_version_id:
                 try:
-                    supabase.table("embeddings").insert({
-                        "contract_id": contract_id,
-                        "version_id": version_id,
-                        "chunk_id": chunk_id,
-                        "embedding": embedding,
-                        "text": chunk["text"],
-                        "page_num": chunk["page"]
-                    }).execute()
-                except Exception as db_exc:
-                    logger.error(f"Failed to store embedding for chunk {chunk_id}: {db_exc}")
-                    continue
-            
+                    vectors = await asyncio.to_thread(self._reusable_vectors, prev_version_id, hashes)
+                except Exception as reuse_exc:
+                    logger.warning(f"Could not reuse embeddings from version {prev_version_id}: {reuse_exc}")
+
+            # Generate embeddings for the remaining chunks in parallel batches
+            missing = {}
+            for chunk, content_hash in zip(chunks, hashes):
+                if content_hash not in vectors:
+                    missing[content_hash] = chunk["text"]
+            if missing:
+                new_vectors = await self._embed_texts(list(missing.values()))
+                vectors.update(zip(missing.keys(), new_vectors))
+
+            # Store in Supabase with bulk upserts
+            rows = [
+                {
+                    "contract_id": contract_id,
+                    "version_id": version_id,
+                    "chunk_id": f"chunk_{i+1}",
+                    "embedding": vectors[content_hash],
+                    "content_hash": content_hash,
+                    "text": chunk["text"],
+                    "page_num": chunk["page"]
+                }
+                for i, (chunk, content_hash) in enumerate(zip(chunks, hashes))
+            ]
+            # Supabase and Redis clients are blocking; keep them off the shared worker loop
+            await asyncio.to_thread(self._store_rows, version_id, rows)
+            await asyncio.to_thread(bump_embeddings_generation, version_id)
+            logger.info(
+                f"Stored {len(rows)} embeddings for version {version_id} "
+                f"({len(rows) - len(missing)} reused, {len(missing)} embedded)"
+            )
             return True
         except Exception as e:
             logger.error(f"Failed to generate embeddings: {e}")
-            return False 
\ No newline at end of file
+            return False
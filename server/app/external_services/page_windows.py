@@ -0,0 +1,79 @@
+"""
+Helpers for running LLM extraction over page-aligned windows of a long contract.
+"""
+from typing import Awaitable, Callable, Dict, List, TypeVar
+import asyncio
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+T = TypeVar("T")
+
+# ~12k tokens of contract text per window, well inside the model's context
+EXTRACTION_WINDOW_CHARS = int(os.getenv("EXTRACTION_WINDOW_CHARS", 48000))
+EXTRACTION_MAX_CONCURRENT_WINDOWS = int(os.getenv("EXTRACTION_MAX_CONCURRENT_WINDOWS", 4))
+
+def format_pages(pages: List[Dict]) -> str:
+    """
+    Renders pages as text with [Page N] markers so the LLM can report real page numbers.
+    """
+    return "\n".join(f"[Page {page['page']}]\n{page['text']}" for page in pages)
+
+def build_page_windows(pages: List[Dict], max_chars: int = EXTRACTION_WINDOW_CHARS) -> List[str]:
+    """
+    Groups consecutive pages into windows of at most max_chars characters, never splitting
+    a page unless the page alone is larger than a window. Returns the formatted window texts.
+    """
+    windows: List[List[Dict]] = []
+    current: List[Dict] = []
+    current_chars = 0
+    for page in pages:
+        pieces = [page["text"][i:i + max_chars] for i in range(0, len(page["text"]), max_chars)] or [""]
+        for piece in pieces:
+            if current and current_chars + len(piece) > max_chars:
+                windows.append(current)
+                current, current_chars = [], 0
+            current.append({"page": page["page"], "text": piece})
+            current_chars += len(piece)
+    if current:
+        windows.append(current)
+    return [format_pages(window) for window in windows]
+
+async def map_windows(
+    windows: List[str],
+    extract: Callable[[str], Awaitable[T]],
+    max_concurrency: int = EXTRACTION_MAX_CONCURRENT_WINDOWS
+) -> List[T]:
+    """
+    Runs extract on every window with at most max_concurrency calls in flight.
+    Results are returned in window order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run(window: str) -> T:
+        async with semaphore:
+            return await extract(window)
+
+    return await asyncio.gather(*(_run(window) for window in windows))
+
+def _dedupe_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def merge_unique(items: List[Dict], text_key: str, group_key: str = None) -> List[Dict]:
+    """
+    Merges window results, dropping items whose text (within the same group, e.g. clause
+    type) is equal to or contained in another item's text. The longer item is kept.
+    """
+    kept: List[Dict] = []
+    for item in sorted(items, key=lambda item: len(item.get(text_key) or ""), reverse=True):
+        key = _dedupe_key(item.get(text_key) or "")
+        duplicate = any(
+            (group_key is None or other.get(group_key) == item.get(group_key))
+            and key in _dedupe_key(other.get(text_key) or "")
+            for other in kept
+        )
+        if not duplicate:
+            kept.append(item)
+    return sorted(kept, key=lambda item: item["page"] if isinstance(item.get("page"), int) else 0)
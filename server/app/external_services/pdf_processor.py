@@ -1,13 +1,17 @@
 """
 PDF text extraction service for contract analysis.
 """
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
 import fitz  # PyMuPDF
-import tempfile
+import asyncio
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
-import requests
+import httpx
+import hashlib
+from server.app.core.page_store import load_pages, save_pages, pages_to_text
+from server.app.core.cache import extraction_cache
+from server.app.core.http_client import download_bytes
 
 load_dotenv()
 
@@ -16,118 +20,117 @@ class PDFProcessor:
         print("[DEBUG] Initializing PDFProcessor")
         self.supabase = supabase_client
     
+    def _iter_page_records(self, doc: fitz.Document) -> Iterator[Dict]:
+        """
+        Yields {"page", "text", "width", "height"} records one page at a time.
+        """
+        for page in doc:
+            yield {
+                "page": page.number + 1,
+                "text": page.get_text(),
+                "width": page.rect.width,
+                "height": page.rect.height
+            }
+
     async def extract_text_from_storage(self, file_url: str) -> Optional[str]:
         """
         Downloads PDF from Supabase storage and extracts all text.
         Returns None if extraction fails.
         """
-        print(f"[DEBUG] Starting text extraction from {file_url}")
-        
+        return await self.extract_text(file_url)
+
+    def _parse_pdf(self, data: bytes) -> List[Dict]:
+        """
+        Parses page records straight from the downloaded buffer; no temporary file.
+        """
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            print(f"[DEBUG] PDF opened successfully. Pages: {len(doc)}")
+            return list(self._iter_page_records(doc))
+
+    async def _page_records(self, file_url: str) -> List[Dict]:
+        """
+        Returns the page records of a PDF URL.
+        Results are cached by the SHA-256 of the PDF bytes, and a file URL that was
+        seen before is served from the cache without downloading it again. Hashing and
+        parsing run in a thread so they don't stall other tasks on the event loop.
+        """
+        known_hash = await asyncio.to_thread(extraction_cache.resolve_alias, file_url)
+        if known_hash:
+            pages = await asyncio.to_thread(extraction_cache.get, known_hash)
+            if pages is not None:
+                print(f"[DEBUG] Extraction cache hit for {file_url}")
+                return pages
+
         try:
             # Download PDF from URL
             print("[DEBUG] Downloading PDF file...")
-            response = requests.get(file_url)
-            response.raise_for_status()
+            data = await download_bytes(file_url)
             print("[DEBUG] PDF download successful")
+        except httpx.HTTPError as e:
+            print(f"[ERROR] Failed to download PDF: {str(e)}")
+            raise e
 
-            # Create a temporary file
-            print("[DEBUG] Creating temporary file...")
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(response.content)
-                temp_path = temp_file.name
-            print(f"[DEBUG] Temporary file created at: {temp_path}")
-
-            try:
-                # Open PDF with PyMuPDF
-                print("[DEBUG] Opening PDF with PyMuPDF...")
-                doc = fitz.open(temp_path)
-                print(f"[DEBUG] PDF opened successfully. Pages: {len(doc)}")
-
-                # Extract text from all pages
-                print("[DEBUG] Extracting text from pages...")
-                text = ""
-                for page_num in range(len(doc)):
-                    print(f"[DEBUG] Processing page {page_num + 1}/{len(doc)}")
-                    page = doc[page_num]
-                    text += page.get_text()
-                
-                print(f"[DEBUG] Text extraction complete. Extracted {len(text)} characters")
-                doc.close()
-                return text
-
-            except Exception as e:
-                print(f"[ERROR] PyMuPDF processing failed: {str(e)}")
-                raise e
-            finally:
-                # Clean up temporary file
-                print("[DEBUG] Cleaning up temporary file...")
-                try:
-                    os.unlink(temp_path)
-                    print("[DEBUG] Temporary file deleted successfully")
-                except Exception as e:
-                    print(f"[WARNING] Failed to delete temporary file: {str(e)}")
+        pdf_hash = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+        pages = await asyncio.to_thread(extraction_cache.get, pdf_hash)
+        if pages is not None:
+            print(f"[DEBUG] Extraction cache hit for PDF {pdf_hash}")
+            await asyncio.to_thread(extraction_cache.set_alias, file_url, pdf_hash)
+            return pages
 
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to download PDF: {str(e)}")
+        try:
+            pages = await asyncio.to_thread(self._parse_pdf, data)
+        except Exception as e:
+            print(f"[ERROR] PyMuPDF processing failed: {str(e)}")
             raise e
+        await asyncio.to_thread(extraction_cache.set, pdf_hash, pages)
+        await asyncio.to_thread(extraction_cache.set_alias, file_url, pdf_hash)
+        return pages
+
+    async def extract_pages(self, file_url: str) -> Optional[List[Dict]]:
+        """
+        Downloads a PDF from storage and extracts the text and size of each page.
+        Returns a list of {"page", "text", "width", "height"} records.
+        """
+        print(f"[DEBUG] Starting page extraction from {file_url}")
+        try:
+            pages = await self._page_records(file_url)
         except Exception as e:
             print(f"[ERROR] Unexpected error in PDF processing: {str(e)}")
             raise e
+        print(f"[DEBUG] Page extraction complete. Extracted {len(pages)} pages")
+        return pages
 
     async def extract_text(self, file_url: str) -> Optional[str]:
         """
         Downloads a PDF from storage and extracts its text content.
         Returns the extracted text or None if extraction fails.
         """
-        print(f"[DEBUG] Starting text extraction from {file_url}")
-        
-        try:
-            # Download PDF from URL
-            print("[DEBUG] Downloading PDF file...")
-            response = requests.get(file_url)
-            response.raise_for_status()
-            print("[DEBUG] PDF download successful")
-
-            # Create a temporary file
-            print("[DEBUG] Creating temporary file...")
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                temp_file.write(response.content)
-                temp_path = temp_file.name
-            print(f"[DEBUG] Temporary file created at: {temp_path}")
-
-            try:
-                # Open PDF with PyMuPDF
-                print("[DEBUG] Opening PDF with PyMuPDF...")
-                doc = fitz.open(temp_path)
-                print(f"[DEBUG] PDF opened successfully. Pages: {len(doc)}")
+        pages = await self.extract_pages(file_url)
+        if pages is None:
+            return None
+        text = pages_to_text(pages)
+        print(f"[DEBUG] Text extraction complete. Extracted {len(text)} characters")
+        return text
 
-                # Extract text from all pages
-                print("[DEBUG] Extracting text from pages...")
-                text = ""
-                for page_num in range(len(doc)):
-                    print(f"[DEBUG] Processing page {page_num + 1}/{len(doc)}")
-                    page = doc[page_num]
-                    text += page.get_text()
-                
-                print(f"[DEBUG] Text extraction complete. Extracted {len(text)} characters")
-                doc.close()
-                return text
-
-            except Exception as e:
-                print(f"[ERROR] PyMuPDF processing failed: {str(e)}")
-                raise e
-            finally:
-                # Clean up temporary file
-                print("[DEBUG] Cleaning up temporary file...")
-                try:
-                    os.unlink(temp_path)
-                    print("[DEBUG] Temporary file deleted successfully")
-                except Exception as e:
-                    print(f"[WARNING] Failed to delete temporary file: {str(e)}")
+    async def get_version_pages(self, version_id: str, file_url: str) -> Optional[List[Dict]]:
+        """
+        Returns the pages of a contract version, reading the ingestion artifact when one
+        exists and otherwise extracting the PDF once and storing the result for later stages.
+        """
+        pages = await asyncio.to_thread(load_pages, version_id)
+        if pages is not None:
+            print(f"[DEBUG] Using stored pages for version {version_id}")
+            return pages
+        pages = await self.extract_pages(file_url)
+        if pages is not None:
+            await asyncio.to_thread(save_pages, version_id, pages)
+        return pages
 
-        except requests.exceptions.RequestException as e:
-            print(f"[ERROR] Failed to download PDF: {str(e)}")
-            raise e
-        except Exception as e:
-            print(f"[ERROR] Unexpected error in PDF processing: {str(e)}")
-            raise e 
\ No newline at end of file
+    async def get_version_text(self, version_id: str, file_url: str) -> Optional[str]:
+        """
+        Returns the full text of a contract version (see get_version_pages).
+        """
+        pages = await self.get_version_pages(version_id, file_url)
+        if pages is None:
+            return None
+        return pages_to_text(pages)
@@ -0,0 +1,261 @@
+"""
+Hybrid lexical + vector retrieval of contract chunks for chat.
+
+Vector search (in-memory index or the match_chunks RPC) finds chunks that paraphrase
+the question; a BM25 inverted index over the version's chunk text finds chunks that
+contain its exact defined terms, section numbers and amounts. The two rankings are
+merged with reciprocal rank fusion, and a larger candidate pool can optionally be
+reranked by a cheap local scorer before the top k are returned.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import math
+import os
+import re
+import threading
+import time
+import logging
+from dotenv import load_dotenv
+from supabase import Client
+from server.app.core.supabase_client import supabase
+from server.app.external_services.vector_index import VectorIndex
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+CHAT_RETRIEVAL_MODE = os.getenv("CHAT_RETRIEVAL_MODE", "hybrid")
+CHAT_MATCH_COUNT = int(os.getenv("CHAT_MATCH_COUNT", 3))
+CHAT_CANDIDATE_POOL = int(os.getenv("CHAT_CANDIDATE_POOL", 12))
+CHAT_RERANK = os.getenv("CHAT_RERANK", "false").lower() == "true"
+LEXICAL_INDEX_MAX_VERSIONS = int(os.getenv("LEXICAL_INDEX_MAX_VERSIONS", 64))
+LEXICAL_FETCH_SIZE = int(os.getenv("LEXICAL_FETCH_SIZE", 1000))
+RRF_K = 60
+
+# Amounts and clause numbers ("$50,000", "12.3", "15%") or words ("non-compete")
+_TOKEN_RE = re.compile(r"\$?\d+(?:[.,]\d+)*%?|[a-z][a-z0-9]*(?:['-][a-z0-9]+)*")
+_QUOTED_RE = re.compile(r"[\"“]([^\"”]+)[\"”]")
+_DEFINED_TERM_RE = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "of", "on", "or", "our", "the", "this", "to",
+    "we", "what", "when", "where", "which", "who", "will", "with", "under", "there"
+}
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased lexical tokens; dollar amounts are also indexed without the sign.
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if token.startswith("$"):
+            tokens.append(token[1:])
+    return tokens
+
+@dataclass(frozen=True)
+class RetrievalOptions:
+    mode: str = CHAT_RETRIEVAL_MODE
+    top_k: int = CHAT_MATCH_COUNT
+    candidate_pool: int = CHAT_CANDIDATE_POOL
+    rerank: bool = CHAT_RERANK
+
+    def __post_init__(self):
+        if self.mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {self.mode}")
+
+    @property
+    def pool_size(self) -> int:
+        # Fusion and reranking need more candidates than the final k
+        if self.mode == "hybrid" or self.rerank:
+            return max(self.top_k, self.candidate_pool)
+        return self.top_k
+
+    def signature(self) -> str:
+        return f"{self.mode}:{self.top_k}:{self.pool_size}:{int(self.rerank)}"
+
+class BM25Index:
+    def __init__(self, chunks: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        for doc_idx, chunk in enumerate(chunks):
+            counts: Dict[str, int] = {}
+            tokens = tokenize(chunk["text"])
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((doc_idx, tf))
+            self.doc_lengths.append(len(tokens))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n = len(chunks)
+        self.idf = {
+            token: math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self.postings.items()
+        }
+
+    def search(self, query: str, k: int) -> List[Dict]:
+        """
+        Returns the k best BM25 matches as chunk records with a "bm25" score.
+        """
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for doc_idx, tf in self.postings[token]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_idx] / (self.avg_length or 1))
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [{**self.chunks[doc_idx], "bm25": score} for doc_idx, score in best]
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], k: int = RRF_K) -> List[Dict]:
+    """
+    Merges ranked chunk lists by chunk_id, scoring each chunk sum(1 / (k + rank)).
+    """
+    merged: Dict[str, Dict] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            entry = merged.setdefault(chunk["chunk_id"], {**chunk, "fused": 0.0})
+            entry.update({key: value for key, value in chunk.items() if key not in entry})
+            entry["fused"] += 1.0 / (k + rank)
+    return sorted(merged.values(), key=lambda chunk: chunk["fused"], reverse=True)
+
+def rerank(question: str, candidates: List[Dict]) -> List[Dict]:
+    """
+    Reorders candidates with a local scorer combining vector similarity, query term
+    coverage, exact matches of salient terms (numbers, quoted phrases, capitalized
+    defined terms) and the fused rank score.
+    """
+    if not candidates:
+        return candidates
+    terms = set(tokenize(question))
+    salient = [t for t in terms if any(ch.isdigit() for ch in t)]
+    salient += [m.lower() for m in _QUOTED_RE.findall(question)]
+    salient += [m.lower() for m in _DEFINED_TERM_RE.findall(question)]
+    max_fused = max(chunk.get("fused", 0.0) for chunk in candidates) or 1.0
+
+    def score(chunk: Dict) -> float:
+        text = chunk["text"].lower()
+        chunk_terms = set(tokenize(text))
+        coverage = len(terms & chunk_terms) / len(terms) if terms else 0.0
+        salient_hits = sum(1 for term in salient if term in text) / len(salient) if salient else 0.0
+        return (
+            0.35 * chunk.get("similarity", 0.0)
+            + 0.25 * coverage
+            + 0.25 * salient_hits
+            + 0.15 * chunk.get("fused", 0.0) / max_fused
+        )
+
+    for chunk in candidates:
+        chunk["rerank"] = score(chunk)
+    return sorted(candidates, key=lambda chunk: chunk["rerank"], reverse=True)
+
+class HybridRetriever:
+    def __init__(
+        self,
+        supabase_client: Optional[Client] = None,
+        vector_index: Optional[VectorIndex] = None,
+        max_lexical_versions: int = LEXICAL_INDEX_MAX_VERSIONS
+    ):
+        self.supabase = supabase_client or supabase
+        self.vector_index = vector_index
+        self.max_lexical_versions = max_lexical_versions
+        self._lexical: "OrderedDict[str, Tuple[int, BM25Index]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _match_chunks(self, version_id: str, question_embedding: List[float], k: int) -> List[Dict]:
+        return self.supabase.rpc(
+            'match_chunks',
+            {
+                'query_embedding': question_embedding,
+                'match_count': k,
+                'contract_version_id': version_id
+            }
+        ).execute().data or []
+
+    async def _vector_search(self, version_id: str, generation: int, question_embedding: List[float], k: int) -> List[Dict]:
+        # In memory for hot versions, otherwise the match_chunks RPC. The index is searched
+        # on the event loop so it can schedule its background load there.
+        chunks = None
+        if self.vector_index is not None:
+            chunks = self.vector_index.search(version_id, generation, question_embedding, k)
+        if chunks is None:
+            chunks = await asyncio.to_thread(self._match_chunks, version_id, question_embedding, k)
+        return chunks
+
+    def _fetch_chunks(self, version_id: str) -> List[Dict]:
+        rows = []
+        start = 0
+        while True:
+            page = self.supabase.table("embeddings").select("chunk_id, text, page_num").eq(
+                "version_id", version_id
+            ).order("chunk_id").range(start, start + LEXICAL_FETCH_SIZE - 1).execute()
+            rows.extend(page.data or [])
+            if len(page.data or []) < LEXICAL_FETCH_SIZE:
+                return rows
+            start += LEXICAL_FETCH_SIZE
+
+    def _lexical_index(self, version_id: str, generation: int) -> BM25Index:
+        with self._lock:
+            cached = self._lexical.get(version_id)
+            if cached is not None and cached[0] == generation and generation >= 0:
+                self._lexical.move_to_end(version_id)
+                return cached[1]
+        index = BM25Index(self._fetch_chunks(version_id))
+        if generation >= 0:
+            with self._lock:
+                self._lexical[version_id] = (generation, index)
+                self._lexical.move_to_end(version_id)
+                while len(self._lexical) > self.max_lexical_versions:
+                    self._lexical.popitem(last=False)
+        return index
+
+    def _lexical_search(self, version_id: str, generation: int, question: str, k: int) -> List[Dict]:
+        return self._lexical_index(version_id, generation).search(question, k)
+
+    async def retrieve(
+        self,
+        version_id: str,
+        generation: int,
+        question: str,
+        question_embedding: Optional[List[float]],
+        options: RetrievalOptions
+    ) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        Returns the top_k chunks for the question and per-stage timings in milliseconds.
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        pool = options.pool_size
+
+        async def timed(name: str, search) -> List[Dict]:
+            stage_started = time.perf_counter()
+            result = await search
+            timings[f"{name}_ms"] = round((time.perf_counter() - stage_started) * 1000, 2)
+            return result
+
+        searches = []
+        if options.mode in ("vector", "hybrid"):
+            searches.append(timed("vector", self._vector_search(version_id, generation, question_embedding, pool)))
+        if options.mode in ("lexical", "hybrid"):
+            searches.append(timed("lexical", asyncio.to_thread(self._lexical_search, version_id, generation, question, pool)))
+        rankings = await asyncio.gather(*searches)
+
+        candidates = reciprocal_rank_fusion(rankings) if len(rankings) > 1 else rankings[0]
+        if options.rerank:
+            rerank_started = time.perf_counter()
+            candidates = rerank(question, candidates)
+            timings["rerank_ms"] = round((time.perf_counter() - rerank_started) * 1000, 2)
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info(f"Retrieved {min(len(candidates), options.top_k)} chunks for version {version_id} ({options.signature()}): {timings}")
+        return candidates[:options.top_k], timings
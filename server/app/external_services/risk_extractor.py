@@ -3,25 +3,30 @@ Service for extracting risks from contract text using GPT.
 """
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
+from server.app.core.cache import llm_cache, llm_cache_key, prompt_version
+from server.app.external_services.page_windows import build_page_windows, map_windows, merge_unique
+from server.app.core.rate_limiter import ainvoke_limited
 
 # Load environment variables
 load_dotenv()
 
 class RiskExtractor:
-    def __init__(self):
+    def __init__(self, llm: Optional[ChatOpenAI] = None):
         print("[DEBUG] Initializing RiskExtractor")
         try:
             print("[DEBUG] Setting up ChatOpenAI...")
             if not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OPENAI_API_KEY not found in environment")
-            self.llm = ChatOpenAI(
+            self.llm = llm or ChatOpenAI(
                 model="gpt-4.1",
                 temperature=0.2
             )
+            self.prompt_version = prompt_version(self._build_risk_prompt(""))
             print("[DEBUG] ChatOpenAI initialized successfully")
         except Exception as e:
             print(f"[ERROR] Failed to initialize ChatOpenAI: {str(e)}")
@@ -31,31 +36,58 @@ class RiskExtractor:
         """
         Extracts risks from contract text using GPT.
         Returns a dictionary with a list of risks.
+        Results are cached per (model, prompt version, text) so unchanged documents skip the LLM.
         """
+        cache_key = llm_cache_key(self.llm.model_name, self.prompt_version, text)
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            print("[DEBUG] Using cached risk extraction result")
+            return cached
         try:
             prompt = self._build_risk_prompt(text)
             messages = [HumanMessage(content=prompt)]
-            response = await self.llm.ainvoke(messages)
+            response = await ainvoke_limited(self.llm, messages)
             try:
-                risks = self._parse_gpt_response(response.content)
+                risks = self.parse_gpt_response(response.content)
                 # Only log the final parsed JSON output once
                 print(f"[INFO] Final risk extraction JSON output: {json.dumps(risks, indent=2)}")
+                await asyncio.to_thread(llm_cache.set, cache_key, risks)
                 return risks
             except Exception as e:
                 raise e
         except Exception as e:
             raise e
 
+    async def extract_risks_from_pages(self, pages: List[Dict]) -> Dict:
+        """
+        Extracts risks from extracted PDF pages. Long documents are split into
+        page-aligned windows that are extracted concurrently, then merged and deduplicated.
+        """
+        windows = build_page_windows(pages)
+        if len(windows) == 1:
+            return await self.extract_risks(windows[0])
+        print(f"[DEBUG] Extracting risks from {len(windows)} page windows")
+        results = await map_windows(windows, self.extract_risks)
+        risks = [risk for result in results for risk in result["risks"]]
+        return {"risks": merge_unique(risks, text_key="risky_text")}
+
+    def task_instructions(self) -> str:
+        """
+        Returns the risk assessment instructions, without the contract text.
+        Shared with ContractAnalyzer, which sends them after a common contract prefix.
+        """
+        return """For each risk, return:\n- Severity: high, medium, or low\n- Description: a short summary of the risk\n- Risky text: the exact passage from the contract\n- Page: the page number (from the nearest [Page N] marker before the passage)\n- Recommendation: a brief suggestion to mitigate the risk\n\nReturn the results in this exact JSON format:\n{\n  \"risks\": [\n    {\n      \"severity\": \"high\",\n      \"description\": \"...\",\n      \"risky_text\": \"...\",\n      \"page\": 3,\n      \"recommendation\": \"...\"\n    }\n  ]\n}\n"""
+
     def _build_risk_prompt(self, text: str) -> str:
         """
         Builds the prompt for GPT to extract risks.
         """
         print("[DEBUG] Building risk extraction prompt")
-        prompt = f"""You are a legal risk analyst. Review the following contract text and identify all passages that may present legal, financial, or compliance risks.\n\nFor each risk, return:\n- Severity: high, medium, or low\n- Description: a short summary of the risk\n- Risky text: the exact passage from the contract\n- Page: the page number (estimate based on text position)\n- Recommendation: a brief suggestion to mitigate the risk\n\nReturn the results in this exact JSON format:\n{{\n  \"risks\": [\n    {{\n      \"severity\": \"high\",\n      \"description\": \"...\",\n      \"risky_text\": \"...\",\n      \"page\": 3,\n      \"recommendation\": \"...\"\n    }}\n  ]\n}}\n\nContract text:\n{text}\n"""
+        prompt = f"""You are a legal risk analyst. Review the following contract text and identify all passages that may present legal, financial, or compliance risks.\n\n{self.task_instructions()}\nContract text:\n{text}\n"""
         print("[DEBUG] Prompt built successfully")
         return prompt
 
-    def _parse_gpt_response(self, response: str) -> Dict:
+    def parse_gpt_response(self, response: str) -> Dict:
         """
         Parses GPT's response into a structured format.
         """
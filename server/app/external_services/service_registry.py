@@ -0,0 +1,111 @@
+"""
+Process-wide registry of long-lived service instances.
+
+Supabase, LLM and embedding clients (and the tiktoken encoding) are expensive to build:
+each one sets up its own HTTP connection pool and TLS sessions. The registry builds them
+once per process - from Celery's worker_process_init in workers and from the FastAPI
+lifespan in the API - and hands the same instances to every task and request.
+"""
+from functools import cached_property
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from supabase import Client
+import tiktoken
+import logging
+from server.app.core.supabase_client import create_supabase_client
+from server.app.external_services.pdf_processor import PDFProcessor
+from server.app.external_services.clause_extractor import ClauseExtractor
+from server.app.external_services.risk_extractor import RiskExtractor
+from server.app.external_services.diff_extractor import DiffExtractor
+from server.app.external_services.embedding_generator import EmbeddingGenerator
+from server.app.external_services.contract_analyzer import ContractAnalyzer
+from server.app.external_services.chat_service import ChatService
+from server.app.external_services.vector_index import VectorIndex
+from server.app.external_services.retrieval import HybridRetriever
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    @cached_property
+    def supabase(self) -> Client:
+        # Built inside the process (after Celery forks) so connections are never shared across workers
+        return create_supabase_client()
+
+    @cached_property
+    def analysis_llm(self) -> ChatOpenAI:
+        """Model shared by clause, risk and diff extraction."""
+        return ChatOpenAI(model="gpt-4.1", temperature=0.2)
+
+    @cached_property
+    def chat_llm(self) -> ChatOpenAI:
+        return ChatOpenAI(model="gpt-3.5-turbo", temperature=0.2)
+
+    @cached_property
+    def embeddings(self) -> OpenAIEmbeddings:
+        return OpenAIEmbeddings(model="text-embedding-3-small")
+
+    @cached_property
+    def tokenizer(self) -> tiktoken.Encoding:
+        return tiktoken.get_encoding("cl100k_base")
+
+    @cached_property
+    def pdf_processor(self) -> PDFProcessor:
+        return PDFProcessor(supabase_client=self.supabase)
+
+    @cached_property
+    def clause_extractor(self) -> ClauseExtractor:
+        return ClauseExtractor(llm=self.analysis_llm)
+
+    @cached_property
+    def risk_extractor(self) -> RiskExtractor:
+        return RiskExtractor(llm=self.analysis_llm)
+
+    @cached_property
+    def contract_analyzer(self) -> ContractAnalyzer:
+        return ContractAnalyzer(clause_extractor=self.clause_extractor, risk_extractor=self.risk_extractor)
+
+    @cached_property
+    def diff_extractor(self) -> DiffExtractor:
+        return DiffExtractor(llm=self.analysis_llm, supabase_client=self.supabase, pdf_processor=self.pdf_processor)
+
+    @cached_property
+    def embedding_generator(self) -> EmbeddingGenerator:
+        return EmbeddingGenerator(embeddings=self.embeddings, tokenizer=self.tokenizer, supabase_client=self.supabase)
+
+    @cached_property
+    def vector_index(self) -> VectorIndex:
+        return VectorIndex(supabase_client=self.supabase)
+
+    @cached_property
+    def retriever(self) -> HybridRetriever:
+        return HybridRetriever(supabase_client=self.supabase, vector_index=self.vector_index)
+
+    @cached_property
+    def chat_service(self) -> ChatService:
+        return ChatService(
+            llm=self.chat_llm,
+            embeddings=self.embeddings,
+            supabase_client=self.supabase,
+            retriever=self.retriever
+        )
+
+services = ServiceRegistry()
+
+def init_worker_services() -> None:
+    """
+    Eagerly builds the services used by the Celery AI tasks.
+    """
+    logger.info("Initializing worker services")
+    services.pdf_processor
+    services.clause_extractor
+    services.risk_extractor
+    services.contract_analyzer
+    services.diff_extractor
+    services.embedding_generator
+
+def init_api_services() -> None:
+    """
+    Eagerly builds the services used by the API request handlers.
+    """
+    logger.info("Initializing API services")
+    services.chat_service
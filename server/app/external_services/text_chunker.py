@@ -0,0 +1,106 @@
+"""
+Token-aware chunking of contract pages for embedding and retrieval.
+"""
+from typing import Dict, Iterator, List, Tuple
+import re
+import tiktoken
+
+# Boundaries we may cut at: blank lines (paragraphs), line starts that open a numbered
+# clause or an ARTICLE/SECTION heading, and whitespace after sentence punctuation
+# (but not after clause numbers such as "2.").
+_HEADING = r"(?:\d+(?:\.\d+)*[.)]?\s|(?:ARTICLE|Article|SECTION|Section|SCHEDULE|Schedule)\b)"
+_BOUNDARY_RE = re.compile(rf"\n\s*\n|\n(?=[ \t]*{_HEADING})|(?<=[^\s\d][.!?;:])\s+")
+_HEADING_RE = re.compile(rf"[ \t]*{_HEADING}")
+
+def split_segments(text: str) -> Iterator[Tuple[str, bool]]:
+    """
+    Splits text at paragraph, clause-heading and sentence boundaries in one pass.
+    Yields (segment, starts_section) with whitespace collapsed; empty segments are skipped.
+    """
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        segment = text[start:match.start()]
+        start = match.end()
+        unit = " ".join(segment.split())
+        if unit:
+            yield unit, bool(_HEADING_RE.match(segment.lstrip("\n")))
+    unit = " ".join(text[start:].split())
+    if unit:
+        yield unit, bool(_HEADING_RE.match(text[start:].lstrip("\n")))
+
+class TextChunker:
+    def __init__(self, tokenizer: tiktoken.Encoding, max_tokens: int = 400, overlap_tokens: int = 50):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def _split_units(self, pages: List[Dict]) -> Iterator[Tuple[str, int, int, bool]]:
+        """
+        Yields (text, page, token_count, starts_section) for every sentence/paragraph unit.
+        Units longer than the token budget are split on token boundaries.
+        """
+        for page in pages:
+            for unit, starts_section in split_segments(page["text"]):
+                yield from self._make_units(unit, page["page"], starts_section)
+
+    def _make_units(self, unit: str, page_num: int, starts_section: bool) -> Iterator[Tuple[str, int, int, bool]]:
+        tokens = self.tokenizer.encode(unit)
+        if len(tokens) <= self.max_tokens:
+            yield unit, page_num, len(tokens), starts_section
+            return
+        step = self.max_tokens - self.overlap_tokens
+        for offset in range(0, len(tokens), step):
+            window = tokens[offset:offset + self.max_tokens]
+            yield self.tokenizer.decode(window), page_num, len(window), starts_section and offset == 0
+            if offset + self.max_tokens >= len(tokens):
+                break
+
+    def chunk_pages(self, pages: List[Dict]) -> List[Dict]:
+        """
+        Packs sentence/paragraph units into chunks of at most max_tokens tokens,
+        repeating up to overlap_tokens of trailing text at the start of the next chunk.
+        A section heading starts a new chunk once the current one is reasonably full.
+        Returns [{"text", "page", "tokens"}] where page is the page the chunk starts on.
+        Runs in time linear in the length of the text.
+        """
+        chunks = []
+        current: List[Tuple[str, int, int]] = []
+        current_tokens = 0
+
+        def flush() -> None:
+            nonlocal current, current_tokens
+            chunks.append({
+                "text": " ".join(unit[0] for unit in current),
+                "page": current[0][1],
+                "tokens": current_tokens
+            })
+            # Carry the trailing units that fit in the overlap budget into the next chunk
+            carried: List[Tuple[str, int, int]] = []
+            carried_tokens = 0
+            for unit in reversed(current):
+                if carried_tokens + unit[2] > self.overlap_tokens:
+                    break
+                carried.append(unit)
+                carried_tokens += unit[2]
+            current = carried[::-1]
+            current_tokens = carried_tokens
+
+        fresh_tokens = 0  # tokens added since the last flush, excluding carried overlap
+        for text, page_num, n_tokens, starts_section in self._split_units(pages):
+            section_break = starts_section and fresh_tokens >= self.max_tokens // 4
+            if fresh_tokens and (current_tokens + n_tokens > self.max_tokens or section_break):
+                flush()
+                fresh_tokens = 0
+                if section_break:
+                    current, current_tokens = [], 0
+            while current and current_tokens + n_tokens > self.max_tokens:
+                current_tokens -= current.pop(0)[2]
+            current.append((text, page_num, n_tokens))
+            current_tokens += n_tokens
+            fresh_tokens += n_tokens
+
+        if fresh_tokens:
+            flush()
+        return chunks
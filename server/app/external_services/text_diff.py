@@ -0,0 +1,48 @@
+"""
+Local, deterministic structural diff between two contract texts.
+
+Both texts are split into clause/paragraph/sentence segments, the segments are aligned
+with difflib, and only the changed spans (with a little surrounding context) are kept.
+"""
+from typing import Dict, List
+import difflib
+from server.app.external_services.text_chunker import split_segments
+
+# Typographic variants that PDF exports swap between versions without changing meaning
+_NORMALIZE_TABLE = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"',
+    "–": "-", "—": "-", " ": " ", "­": None,
+})
+
+def normalize_segment(segment: str) -> str:
+    """
+    Normalizes quotes, dashes and whitespace so cosmetic edits don't count as changes.
+    """
+    return " ".join(segment.translate(_NORMALIZE_TABLE).split())
+
+def segment_text(text: str) -> List[str]:
+    """
+    Splits text into normalized segments.
+    """
+    return [normalize_segment(segment) for segment, _ in split_segments(text)]
+
+def compute_hunks(prev_text: str, curr_text: str, context: int = 1) -> List[Dict]:
+    """
+    Aligns the segments of both texts and returns the changed spans.
+    Each hunk is {"old", "new", "context_before", "context_after"}; an empty list means
+    the texts are identical after normalization.
+    """
+    prev_segments = segment_text(prev_text)
+    curr_segments = segment_text(curr_text)
+    matcher = difflib.SequenceMatcher(None, prev_segments, curr_segments, autojunk=False)
+    hunks = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        hunks.append({
+            "old": " ".join(prev_segments[i1:i2]),
+            "new": " ".join(curr_segments[j1:j2]),
+            "context_before": " ".join(curr_segments[max(0, j1 - context):j1]),
+            "context_after": " ".join(curr_segments[j2:j2 + context]),
+        })
+    return hunks
@@ -0,0 +1,176 @@
+"""
+In-process vector index for frequently queried contract versions.
+
+A version's chunk vectors are loaded from the embeddings table into one contiguous,
+L2-normalized float32 matrix, so a similarity search is a single matrix-vector product
+instead of a match_chunks round trip. Versions are loaded once they have been queried
+VECTOR_INDEX_MIN_QUERIES times, evicted least recently used first when the total
+matrix size exceeds VECTOR_INDEX_MAX_BYTES, and dropped when their embeddings
+generation changes. Callers fall back to the RPC whenever search returns None.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import asyncio
+import json
+import os
+import threading
+import logging
+import numpy as np
+from dotenv import load_dotenv
+from supabase import Client
+from server.app.core.supabase_client import supabase
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_MAX_BYTES = int(os.environ.get("VECTOR_INDEX_MAX_BYTES", 256 * 1024 * 1024))
+VECTOR_INDEX_MIN_QUERIES = int(os.environ.get("VECTOR_INDEX_MIN_QUERIES", 3))
+VECTOR_INDEX_FETCH_SIZE = int(os.environ.get("VECTOR_INDEX_FETCH_SIZE", 1000))
+# Versions whose miss counts are tracked; the least recently missed are forgotten first
+VECTOR_INDEX_MAX_TRACKED = int(os.environ.get("VECTOR_INDEX_MAX_TRACKED", 10000))
+
+class _VersionIndex:
+    def __init__(self, generation: int, matrix: np.ndarray, chunks: List[Dict]):
+        self.generation = generation
+        self.matrix = matrix
+        self.chunks = chunks
+        self.nbytes = matrix.nbytes + sum(len(chunk["text"]) for chunk in chunks)
+
+class VectorIndex:
+    def __init__(
+        self,
+        supabase_client: Optional[Client] = None,
+        max_bytes: int = VECTOR_INDEX_MAX_BYTES,
+        min_queries: int = VECTOR_INDEX_MIN_QUERIES,
+        max_tracked: int = VECTOR_INDEX_MAX_TRACKED
+    ):
+        self.supabase = supabase_client or supabase
+        self.max_bytes = max_bytes
+        self.min_queries = min_queries
+        self.max_tracked = max_tracked
+        self._indexes: "OrderedDict[str, _VersionIndex]" = OrderedDict()
+        self._query_counts: "OrderedDict[str, int]" = OrderedDict()
+        self._loading: set = set()
+        self._load_tasks: set = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _size(self) -> int:
+        return sum(index.nbytes for index in self._indexes.values())
+
+    def _fetch(self, version_id: str) -> List[Dict]:
+        rows = []
+        start = 0
+        while True:
+            page = self.supabase.table("embeddings").select("chunk_id, text, page_num, embedding").eq(
+                "version_id", version_id
+            ).order("chunk_id").range(start, start + VECTOR_INDEX_FETCH_SIZE - 1).execute()
+            rows.extend(page.data or [])
+            if len(page.data or []) < VECTOR_INDEX_FETCH_SIZE:
+                return rows
+            start += VECTOR_INDEX_FETCH_SIZE
+
+    def load(self, version_id: str, generation: int) -> None:
+        """
+        Loads (or reloads) a version's vectors into memory, evicting other versions
+        as needed to stay within the memory budget.
+        """
+        try:
+            rows = self._fetch(version_id)
+            if not rows:
+                return
+            # pgvector columns come back from PostgREST as "[0.1,0.2,...]" strings
+            vectors = [json.loads(row["embedding"]) if isinstance(row["embedding"], str) else row["embedding"] for row in rows]
+            matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+            chunks = [{"chunk_id": row["chunk_id"], "text": row["text"], "page_num": row["page_num"]} for row in rows]
+            index = _VersionIndex(generation, matrix, chunks)
+            if index.nbytes > self.max_bytes:
+                logger.info(f"Version {version_id} is larger than the vector index budget; not indexing")
+                return
+            with self._lock:
+                self._indexes.pop(version_id, None)
+                self._indexes[version_id] = index
+                # Indexed versions are tracked by the LRU; after eviction they must get hot again
+                self._query_counts.pop(version_id, None)
+                while self._size() > self.max_bytes:
+                    evicted_id, _ = self._indexes.popitem(last=False)
+                    self._evictions += 1
+                    logger.info(f"Evicted version {evicted_id} from the vector index")
+            logger.info(f"Indexed {len(chunks)} chunks for version {version_id} in memory")
+        except Exception as e:
+            logger.warning(f"Failed to load vector index for version {version_id}: {e}")
+        finally:
+            with self._lock:
+                self._loading.discard(version_id)
+
+    def _schedule_load(self, version_id: str, generation: int) -> None:
+        with self._lock:
+            if version_id in self._loading:
+                return
+            self._loading.add(version_id)
+        try:
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.load, version_id, generation))
+            self._load_tasks.add(task)
+            task.add_done_callback(self._load_tasks.discard)
+        except RuntimeError:
+            # No running loop (sync caller): load inline
+            self.load(version_id, generation)
+
+    def search(self, version_id: str, generation: int, query_embedding: List[float], k: int) -> Optional[List[Dict]]:
+        """
+        Returns the k chunks most similar to the query, shaped like match_chunks rows,
+        or None if the version is not indexed at this generation (a background load is
+        started once the version is hot).
+        """
+        if not self.enabled or generation < 0:
+            return None
+        with self._lock:
+            index = self._indexes.get(version_id)
+            if index is not None and index.generation != generation:
+                # Embeddings were rewritten since this version was loaded
+                del self._indexes[version_id]
+                index = None
+            if index is not None:
+                self._indexes.move_to_end(version_id)
+                self._hits += 1
+            else:
+                self._misses += 1
+                self._query_counts[version_id] = self._query_counts.get(version_id, 0) + 1
+                self._query_counts.move_to_end(version_id)
+                while len(self._query_counts) > self.max_tracked:
+                    self._query_counts.popitem(last=False)
+                hot = self._query_counts[version_id] >= self.min_queries
+        if index is None:
+            if hot:
+                self._schedule_load(version_id, generation)
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = index.matrix @ (query / (np.linalg.norm(query) + 1e-12))
+        k = min(k, len(index.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**index.chunks[i], "similarity": float(scores[i])} for i in top]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "versions": len(self._indexes),
+                "size_bytes": self._size(),
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions
+            }
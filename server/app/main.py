@@ -1,12 +1,23 @@
 # app/main.py
 # Entry point for FastAPI app. Routers and setup are imported from modules.
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from server.app.api.auth import router as auth_router
 from server.app.api.contracts import router as contracts_router
 from server.app.api.chat import router as chat_router
+from server.app.api.metrics import router as metrics_router
+from server.app.external_services.service_registry import init_api_services
+from server.app.core.http_client import close_http_client
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build shared service clients once for the lifetime of the process
+    init_api_services()
+    yield
+    await close_http_client()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -20,6 +31,5 @@ app.add_middleware(
 # Register routers
 app.include_router(auth_router, prefix="/auth")
 app.include_router(contracts_router)
-app.include_router(chat_router) 
-
-
+app.include_router(chat_router)
+app.include_router(metrics_router)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+class ChatRequest(BaseModel):
+    text: str = Field(min_length=1)
+    # Retrieval overrides; server defaults apply when omitted
+    retrieval_mode: Optional[Literal["vector", "lexical", "hybrid"]] = None
+    top_k: Optional[int] = Field(default=None, ge=1, le=10)
+    candidate_pool: Optional[int] = Field(default=None, ge=1, le=50)
+    rerank: Optional[bool] = None
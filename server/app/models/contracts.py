@@ -41,6 +41,9 @@ class ContractVersionResponse(BaseModel):
     file_url: str
     status: str
     created_at: Optional[str]
+    file_sha256: Optional[str] = None
+    file_size: Optional[int] = None
+    page_count: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -61,4 +64,12 @@ class ParticipantResponse(BaseModel):
     signing_order: Optional[int]
     status: str
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class BulkImportRequest(BaseModel):
+    # The Contract Manager of every imported contract (the requesting admin is not added)
+    owner_id: UUID
+    # Paths are relative to the server's BULK_IMPORT_ROOT
+    source_dir: Optional[str] = None
+    manifest_path: Optional[str] = None
+    contract_status: ContractStatus = ContractStatus.Signed
@@ -0,0 +1,12 @@
+-- One row per (contract_id, version_id, type), the conflict target of the stage status upserts
+
+-- Keep only the newest row of stages duplicated by the old per-run inserts
+delete from ai_tasks a
+using ai_tasks b
+where a.contract_id = b.contract_id
+  and a.version_id = b.version_id
+  and a.type = b.type
+  and (coalesce(a.updated_at, a.created_at), a.id) < (coalesce(b.updated_at, b.created_at), b.id);
+
+create unique index if not exists ai_tasks_contract_version_type_unique
+on ai_tasks (contract_id, version_id, type);
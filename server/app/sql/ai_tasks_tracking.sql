@@ -0,0 +1,10 @@
+-- Stage timing and failure details for the per-version AI workflow
+alter table ai_tasks add column if not exists started_at timestamp with time zone;
+alter table ai_tasks add column if not exists finished_at timestamp with time zone;
+alter table ai_tasks add column if not exists duration_ms integer;
+alter table ai_tasks add column if not exists error text;
+
+-- The shared text-extraction step is tracked as its own stage
+alter table ai_tasks drop constraint if exists ai_tasks_type_check;
+alter table ai_tasks add constraint ai_tasks_type_check
+check (type in ('TextExtraction', 'ClauseExtraction', 'RiskAssessment', 'Embedding', 'Diff', 'Chat'));
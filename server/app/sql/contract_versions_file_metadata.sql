@@ -0,0 +1,4 @@
+-- File metadata computed while a version's PDF is streamed to storage
+alter table contract_versions add column if not exists file_sha256 text;
+alter table contract_versions add column if not exists file_size bigint;
+alter table contract_versions add column if not exists page_count integer;
@@ -0,0 +1,5 @@
+-- Content hash per embedded chunk, used to reuse vectors of unchanged chunks across versions
+alter table embeddings add column if not exists content_hash text;
+
+create index if not exists idx_embeddings_version_content_hash
+on embeddings (version_id, content_hash);
@@ -0,0 +1,12 @@
+-- One row per (version_id, chunk_id), the conflict target of the embedding upserts
+
+-- Keep a single row for chunks duplicated by earlier re-runs of embedding generation
+delete from embeddings a
+using embeddings b
+where a.version_id = b.version_id
+  and a.chunk_id = b.chunk_id
+  and a.ctid > b.ctid;
+
+-- A unique index (rather than a constraint) so the migration can be re-run
+create unique index if not exists embeddings_version_chunk_unique
+on embeddings (version_id, chunk_id);
@@ -0,0 +1,45 @@
+-- Flattened view of the contracts each user participates in, for the paginated /contracts/me listing.
+-- security_invoker makes the view apply the caller's RLS policies on contracts and
+-- contract_participants instead of its owner's rights; only the API (service role) reads it.
+create or replace view user_contracts
+with (security_invoker = true) as
+select
+  p.user_id,
+  p.role,
+  c.id,
+  c.title,
+  c.status,
+  c.expiry_date,
+  c.created_by,
+  c.created_at,
+  c.updated_at
+from contract_participants p
+join contracts c on c.id = p.contract_id;
+
+revoke all on user_contracts from anon, authenticated;
+
+-- Keyset pagination order (updated_at desc, id desc) and per-user lookups
+create index if not exists idx_contracts_updated_at_id on contracts (updated_at desc, id desc);
+create index if not exists idx_contract_participants_user_id on contract_participants (user_id);
+
+-- Per-status totals for a user's dashboard tiles
+create or replace function user_contract_status_counts(p_user_id uuid)
+returns table (
+  status text,
+  total bigint
+)
+language sql stable
+as $$
+  select c.status::text, count(*)
+  from contract_participants p
+  join contracts c on c.id = p.contract_id
+  where p.user_id = p_user_id
+  group by c.status;
+$$;
+
+-- The function takes any user id, so only the API (service role) may call it
+revoke execute on function user_contract_status_counts(uuid) from public, anon, authenticated;
+grant execute on function user_contract_status_counts(uuid) to service_role;
+
+-- Status summaries and per-version result lookups on the detail page
+create index if not exists idx_ai_tasks_contract_version on ai_tasks (contract_id, version_id);
@@ -0,0 +1,79 @@
+"""
+Runs the async bodies of Celery tasks on one long-running event loop per worker process.
+
+The loop lives in a background thread. Task threads submit their coroutines to it and
+wait for the result, so with a thread pool (`--pool threads`) several AI tasks can be in
+flight on the same loop, sharing the connection pools of the service registry, while
+they wait on OpenAI and Supabase. At most ASYNC_TASK_CONCURRENCY run at once.
+"""
+from typing import Any, Coroutine, Optional
+import asyncio
+import os
+import threading
+import logging
+from dotenv import load_dotenv
+from server.app.core.http_client import close_http_client
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ASYNC_TASK_CONCURRENCY = int(os.environ.get("ASYNC_TASK_CONCURRENCY", 8))
+
+_lock = threading.Lock()
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns this process's event loop, starting its thread on first use.
+    A loop inherited from a parent process through fork has no running thread and is replaced.
+    """
+    global _loop, _thread, _slots
+    with _lock:
+        if _loop is None or _loop.is_closed() or _thread is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _slots = None
+            _thread = threading.Thread(target=_run_loop, args=(_loop,), name="async-task-loop", daemon=True)
+            _thread.start()
+            logger.info(f"Started worker event loop (max {ASYNC_TASK_CONCURRENCY} concurrent tasks)")
+        return _loop
+
+async def _run_limited(coro: Coroutine[Any, Any, Any]) -> Any:
+    global _slots
+    if _slots is None:
+        # Created on the loop thread so the semaphore belongs to the worker loop
+        _slots = asyncio.Semaphore(ASYNC_TASK_CONCURRENCY)
+    async with _slots:
+        return await coro
+
+def run_async(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """
+    Runs coro on the worker loop and blocks the calling task thread until it finishes.
+    """
+    future = asyncio.run_coroutine_threadsafe(_run_limited(coro), get_worker_loop())
+    return future.result(timeout)
+
+def stop_worker_loop() -> None:
+    """
+    Closes the loop's pooled HTTP connections, then stops the worker loop and waits for
+    its thread to exit.
+    """
+    global _loop, _thread
+    with _lock:
+        if _loop is not None and _thread is not None and _thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(close_http_client(), _loop).result(10)
+            except Exception as e:
+                logger.warning(f"Failed to close the worker HTTP client: {e}")
+            _loop.call_soon_threadsafe(_loop.stop)
+            _thread.join(timeout=10)
+        _loop = None
+        _thread = None
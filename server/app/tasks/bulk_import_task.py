@@ -0,0 +1,81 @@
+"""
+Celery task for bulk importing an archive of contract PDFs.
+"""
+from typing import Dict, Optional
+import hashlib
+import os
+from server.app.core.redis_client import get_redis
+from server.app.external_services.service_registry import services
+from server.app.external_services.bulk_importer import BulkImporter, iter_directory, iter_manifest
+from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JOB_OWNER_KEY = "clauseiq:bulk-import:{job_id}:owner"
+JOB_OWNER_TTL_SECONDS = int(os.environ.get("BULK_IMPORT_JOB_TTL_SECONDS", 7 * 24 * 60 * 60))
+# One run per checkpoint at a time; the lock is extended after every batch
+IMPORT_LOCK_KEY = "clauseiq:bulk-import:{import_id}:lock"
+IMPORT_LOCK_TIMEOUT_SECONDS = int(os.environ.get("BULK_IMPORT_LOCK_TIMEOUT_SECONDS", 60 * 60))
+
+def set_job_owner(job_id: str, user_id: str) -> None:
+    """
+    Records the user who started a bulk import job; only they may read its status.
+    """
+    get_redis().set(JOB_OWNER_KEY.format(job_id=job_id), user_id, ex=JOB_OWNER_TTL_SECONDS)
+
+def get_job_owner(job_id: str) -> Optional[str]:
+    return get_redis().get(JOB_OWNER_KEY.format(job_id=job_id))
+
+# Acked on receipt: an import runs for hours, longer than the broker's visibility timeout,
+# and a redelivered message would start a second run on the same checkpoint
+@app.task(name='bulk_import', bind=True, acks_late=False)
+def bulk_import_contracts(
+    self,
+    created_by: str,
+    checkpoint_path: str,
+    source_dir: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    contract_status: str = "Signed"
+) -> Dict:
+    """
+    Imports every PDF from source_dir or manifest_path and queues them on the bulk lane.
+    Progress (counts, docs/sec, pages/sec) is published as the task's PROGRESS state.
+    Fails if another run on the same checkpoint is still holding its lock.
+    """
+    import_id = hashlib.sha256(checkpoint_path.encode("utf-8")).hexdigest()[:16]
+    # Not thread-local: the lock is extended from the worker loop thread
+    lock = get_redis().lock(
+        IMPORT_LOCK_KEY.format(import_id=import_id),
+        timeout=IMPORT_LOCK_TIMEOUT_SECONDS,
+        thread_local=False
+    )
+    if not lock.acquire(blocking=False):
+        raise RuntimeError("An import of this source is already running.")
+
+    # Progress is reported from the worker loop thread, where self.request (thread-local) is empty
+    task_id = self.request.id
+
+    def _on_progress(report: Dict) -> None:
+        lock.extend(IMPORT_LOCK_TIMEOUT_SECONDS, replace_ttl=True)
+        self.update_state(task_id=task_id, state="PROGRESS", meta=report)
+
+    try:
+        items = iter_manifest(manifest_path) if manifest_path else iter_directory(source_dir)
+        importer = BulkImporter(
+            supabase_client=services.supabase,
+            created_by=created_by,
+            checkpoint_path=checkpoint_path,
+            contract_status=contract_status,
+            on_progress=_on_progress
+        )
+        report = run_async(importer.run(items))
+    finally:
+        try:
+            lock.release()
+        except Exception as e:
+            logger.warning(f"Failed to release bulk import lock {import_id}: {e}")
+    logger.info(f"Bulk import finished: {report}")
+    return report
@@ -1,17 +1,49 @@
 from celery import Celery
+from kombu import Queue
+from celery.signals import worker_init, worker_process_init, worker_shutdown, worker_process_shutdown
+import os
+from server.app.core.redis_client import REDIS_URL
 
 app = Celery(
     'clauseiq',
-    broker='redis://localhost:6379/0',
-    backend='redis://localhost:6379/0',
+    broker=REDIS_URL,
+    backend=REDIS_URL,
     include=[
+        'server.app.tasks.ingestion_task',
         'server.app.tasks.clause_extraction_task',
         'server.app.tasks.risk_extraction_task',
+        'server.app.tasks.contract_analysis_task',
         'server.app.tasks.diff_extraction_task',
         'server.app.tasks.embedding_task',
+        'server.app.tasks.workflow',
+        'server.app.tasks.bulk_import_task',
     ]
 )
 
+# Queue routing: each kind of work has its own queue per lane, named "<stage>.<lane>".
+# The interactive lane carries uploads a user is waiting on; the bulk lane carries
+# backfills and re-processing. Run separate workers per stage to size them separately, e.g.
+#   celery -A server.app.tasks.celery_app worker -Q llm.interactive,llm.bulk -c 4 -n llm@%h
+# Queues are consumed in the order given to -Q, so list the interactive lane first.
+TASK_STAGES = {
+    'bulk_import': 'pipeline',
+    'ingest_contract_version': 'pipeline',
+    'version_workflow_completed': 'pipeline',
+    'generate_embeddings': 'embeddings',
+    'extract_clauses': 'llm',
+    'extract_risks': 'llm',
+    'analyze_contract': 'llm',
+    'extract_diff': 'diff',
+}
+LANES = ('interactive', 'bulk')
+DEFAULT_LANE = 'interactive'
+
+def queue_for(task_name: str, lane: str = DEFAULT_LANE) -> str:
+    """Returns the queue a task should be sent to for the given lane."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane: {lane}")
+    return f"{TASK_STAGES[task_name]}.{lane}"
+
 # Configure Celery
 app.conf.update(
     task_serializer='json',
@@ -19,4 +51,42 @@ app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
-) 
\ No newline at end of file
+    # AI tasks mostly wait on network I/O: a thread pool lets one process keep several
+    # of them in flight on the shared worker event loop (see tasks/async_runner.py).
+    worker_pool=os.environ.get("CELERY_WORKER_POOL", "threads"),
+    worker_concurrency=int(os.environ.get("CELERY_WORKER_CONCURRENCY", 8)),
+    # AI tasks are long; don't let one worker reserve work another idle worker could start
+    worker_prefetch_multiplier=int(os.environ.get("CELERY_PREFETCH_MULTIPLIER", 1)),
+    task_acks_late=True,
+    task_queues=[Queue(f"{stage}.{lane}") for stage in sorted(set(TASK_STAGES.values())) for lane in LANES],
+    task_routes={
+        **{name: {'queue': queue_for(name)} for name in TASK_STAGES},
+        'bulk_import': {'queue': queue_for('bulk_import', 'bulk')},
+    },
+    task_default_queue=f"pipeline.{DEFAULT_LANE}",
+    # Poll queues in -Q order so the interactive lane is always drained first
+    broker_transport_options={'queue_order_strategy': 'priority'},
+)
+
+def _init_process_services() -> None:
+    from server.app.external_services.service_registry import init_worker_services
+    from server.app.tasks.async_runner import get_worker_loop
+    init_worker_services()
+    get_worker_loop()
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Builds the shared clients and event loop once per prefork child process."""
+    _init_process_services()
+
+@worker_init.connect
+def init_worker(sender=None, **kwargs):
+    """Builds the shared clients and event loop for non-forking pools (threads)."""
+    if app.conf.worker_pool != "prefork":
+        _init_process_services()
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker(**kwargs):
+    from server.app.tasks.async_runner import stop_worker_loop
+    stop_worker_loop()
@@ -3,11 +3,11 @@ Celery task for contract clause extraction.
 """
 from celery import shared_task
 from typing import Optional, Dict
-import asyncio
-from server.app.external_services.pdf_processor import PDFProcessor
-from server.app.external_services.clause_extractor import ClauseExtractor
-from server.app.core.supabase_client import create_supabase_client
+from server.app.external_services.service_registry import services
 from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+from server.app.tasks.task_status import track_stage
+import asyncio
 import json
 
 @app.task(name='extract_clauses')
@@ -18,47 +18,31 @@ def extract_clauses_from_contract(contract_id: str, version_id: str, file_url: s
     """
     async def _process():
         try:
-            supabase = create_supabase_client()
-            pdf_processor = PDFProcessor(supabase_client=supabase)
-            clause_extractor = ClauseExtractor()
-            text = await pdf_processor.extract_text(file_url)
-            if not text:
-                return False
-            clauses = await clause_extractor.extract_clauses(text)
-            if not clauses:
-                return False
-            result = supabase.table("ai_tasks").insert({
-                "contract_id": contract_id,
-                "version_id": version_id,
-                "type": "ClauseExtraction",
-                "status": "Completed",
-                "result": json.dumps(clauses)
-            }).execute()
-            if hasattr(result, "error") and result.error:
-                return False
+            async with track_stage(contract_id, version_id, "ClauseExtraction") as stage:
+                pages = await services.pdf_processor.get_version_pages(version_id, file_url)
+                if not pages:
+                    raise ValueError("No text could be extracted from the PDF")
+                clauses = await services.clause_extractor.extract_clauses_from_pages(pages)
+                if not clauses:
+                    raise ValueError("Clause extraction returned no result")
+                stage.result = json.dumps(clauses)
             return True
         except Exception as e:
             return False
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_process())
-    finally:
-        loop.close()
+    return run_async(_process())
 
 async def update_task_status(task_id: str, status: str, result: Optional[Dict] = None) -> None:
     """Updates the status and result of an AI task."""
     print(f"[DEBUG] Updating task {task_id} status to {status}")
     try:
-        # Create a new Supabase client for this function
-        supabase = create_supabase_client()
+        supabase = services.supabase
         
         update_data = {"status": status}
         if result is not None:
             update_data["result"] = result
         
-        supabase.table("ai_tasks").update(update_data).eq("id", task_id).execute()
+        await asyncio.to_thread(lambda: supabase.table("ai_tasks").update(update_data).eq("id", task_id).execute())
         print("[DEBUG] Task update successful")
     except Exception as e:
         print(f"[ERROR] Failed to update task status: {str(e)}")
-        raise e 
\ No newline at end of file
+        raise e
\ No newline at end of file
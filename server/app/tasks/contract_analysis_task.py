@@ -0,0 +1,30 @@
+"""
+Celery task for the fused clause extraction and risk assessment pass.
+"""
+from server.app.external_services.service_registry import services
+from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+from server.app.tasks.task_status import track_stage
+import json
+
+@app.task(name='analyze_contract')
+def analyze_contract(contract_id: str, version_id: str, file_url: str) -> bool:
+    """
+    Extracts clauses and risks from a contract PDF in one pass over a shared prompt
+    prefix and stores both the ClauseExtraction and RiskAssessment rows in ai_tasks.
+    Returns True if successful, False otherwise.
+    """
+    async def _process():
+        try:
+            async with track_stage(contract_id, version_id, "ClauseExtraction") as clause_stage, \
+                    track_stage(contract_id, version_id, "RiskAssessment") as risk_stage:
+                pages = await services.pdf_processor.get_version_pages(version_id, file_url)
+                if not pages:
+                    raise ValueError("No text could be extracted from the PDF")
+                analysis = await services.contract_analyzer.analyze_pages(pages)
+                risk_stage.result = json.dumps(analysis["risks"])
+                clause_stage.result = json.dumps(analysis["clauses"])
+            return True
+        except Exception as e:
+            return False
+    return run_async(_process())
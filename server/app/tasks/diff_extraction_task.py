@@ -2,30 +2,28 @@
 Celery task for contract version diff extraction.
 """
 from celery import shared_task
-import asyncio
-from server.app.external_services.pdf_processor import PDFProcessor
-from server.app.external_services.diff_extractor import DiffExtractor
-from server.app.core.supabase_client import create_supabase_client
+from typing import Optional
+from server.app.external_services.service_registry import services
 from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+from server.app.tasks.task_status import track_stage
 import json
 
 @app.task(name='extract_diff')
-def extract_diff_from_contract(contract_id: str, version_id: str, prev_file_url: str, curr_file_url: str) -> bool:
+def extract_diff_from_contract(contract_id: str, version_id: str, prev_file_url: str, curr_file_url: str, prev_version_id: Optional[str] = None) -> bool:
     """
     Extracts and summarizes differences between two contract versions and stores results in ai_tasks table.
     Returns True if successful, False otherwise.
     """
     async def _process():
         try:
-            diff_extractor = DiffExtractor()
-            diff_result = await diff_extractor.extract_diff(contract_id, version_id, prev_file_url, curr_file_url)
-            print(f"[INFO] Final diff extraction JSON output: {json.dumps(diff_result, indent=2)}")
-            return True if diff_result else False
+            async with track_stage(contract_id, version_id, "Diff") as stage:
+                diff_result = await services.diff_extractor.extract_diff(contract_id, version_id, prev_file_url, curr_file_url, prev_version_id=prev_version_id)
+                if not diff_result:
+                    raise ValueError("Diff extraction returned no result")
+                print(f"[INFO] Final diff extraction JSON output: {json.dumps(diff_result, indent=2)}")
+                stage.result = diff_result
+            return True
         except Exception as e:
             return False
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_process())
-    finally:
-        loop.close() 
\ No newline at end of file
+    return run_async(_process())
\ No newline at end of file
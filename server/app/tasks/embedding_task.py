@@ -2,45 +2,38 @@
 Celery task for generating contract embeddings.
 """
 from celery import shared_task
-import asyncio
-from server.app.external_services.pdf_processor import PDFProcessor
-from server.app.external_services.embedding_generator import EmbeddingGenerator
-from server.app.core.supabase_client import create_supabase_client
+from typing import Optional
+from server.app.external_services.service_registry import services
 from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+from server.app.tasks.task_status import track_stage
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 @app.task(name='generate_embeddings')
-def generate_embeddings_for_contract(contract_id: str, version_id: str, file_url: str) -> bool:
+def generate_embeddings_for_contract(contract_id: str, version_id: str, file_url: str, prev_version_id: Optional[str] = None) -> bool:
     """
     Generates embeddings for a contract PDF and stores them in embeddings table.
     Returns True if successful, False otherwise.
     """
     async def _process():
         try:
-            supabase = create_supabase_client()
-            pdf_processor = PDFProcessor(supabase_client=supabase)
-            embedding_generator = EmbeddingGenerator()
-            
-            # Extract text
-            text = await pdf_processor.extract_text(file_url)
-            if not text:
-                logger.error("Failed to extract text from PDF")
-                return False
-                
-            # Generate and store embeddings
-            success = await embedding_generator.generate_and_store(contract_id, version_id, text)
-            return success
+            async with track_stage(contract_id, version_id, "Embedding"):
+                # Extract pages
+                pages = await services.pdf_processor.get_version_pages(version_id, file_url)
+                if not pages:
+                    raise ValueError("No text could be extracted from the PDF")
+
+                # Generate and store embeddings
+                success = await services.embedding_generator.generate_and_store(contract_id, version_id, pages, prev_version_id=prev_version_id)
+                if not success:
+                    raise ValueError("Embedding generation failed")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to generate embeddings: {e}")
             return False
             
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_process())
-    finally:
-        loop.close() 
\ No newline at end of file
+    return run_async(_process())
\ No newline at end of file
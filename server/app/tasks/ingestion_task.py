@@ -0,0 +1,34 @@
+"""
+Celery task for the single-pass text extraction stage of a contract version.
+"""
+from server.app.external_services.service_registry import services
+from server.app.core.page_store import save_pages
+from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+from server.app.tasks.task_status import track_stage
+import asyncio
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+@app.task(name='ingest_contract_version')
+def ingest_contract_version(contract_id: str, version_id: str, file_url: str) -> bool:
+    """
+    Downloads and parses a contract version's PDF once and stores the per-page text
+    for the version, so the downstream AI stages can read it instead of the PDF.
+    Returns True if successful, False otherwise.
+    """
+    async def _process():
+        try:
+            async with track_stage(contract_id, version_id, "TextExtraction") as stage:
+                pages = await services.pdf_processor.extract_pages(file_url)
+                if not pages:
+                    raise ValueError("No text could be extracted from the PDF")
+                await asyncio.to_thread(save_pages, version_id, pages)
+                stage.result = {"pages": len(pages)}
+            return True
+        except Exception as e:
+            logger.error(f"Ingestion failed for contract {contract_id}, version {version_id}: {e}")
+            return False
+    return run_async(_process())
@@ -3,11 +3,10 @@ Celery task for contract risk assessment extraction.
 """
 from celery import shared_task
 from typing import Optional, Dict
-import asyncio
-from server.app.external_services.pdf_processor import PDFProcessor
-from server.app.external_services.risk_extractor import RiskExtractor
-from server.app.core.supabase_client import create_supabase_client
+from server.app.external_services.service_registry import services
 from server.app.tasks.celery_app import app
+from server.app.tasks.async_runner import run_async
+from server.app.tasks.task_status import track_stage
 import json
 
 @app.task(name='extract_risks')
@@ -18,30 +17,15 @@ def extract_risks_from_contract(contract_id: str, version_id: str, file_url: str
     """
     async def _process():
         try:
-            supabase = create_supabase_client()
-            pdf_processor = PDFProcessor(supabase_client=supabase)
-            risk_extractor = RiskExtractor()
-            text = await pdf_processor.extract_text(file_url)
-            if not text:
-                return False
-            risks = await risk_extractor.extract_risks(text)
-            if not risks:
-                return False
-            result = supabase.table("ai_tasks").insert({
-                "contract_id": contract_id,
-                "version_id": version_id,
-                "type": "RiskAssessment",
-                "status": "Completed",
-                "result": json.dumps(risks)
-            }).execute()
-            if hasattr(result, "error") and result.error:
-                return False
+            async with track_stage(contract_id, version_id, "RiskAssessment") as stage:
+                pages = await services.pdf_processor.get_version_pages(version_id, file_url)
+                if not pages:
+                    raise ValueError("No text could be extracted from the PDF")
+                risks = await services.risk_extractor.extract_risks_from_pages(pages)
+                if not risks:
+                    raise ValueError("Risk extraction returned no result")
+                stage.result = json.dumps(risks)
             return True
         except Exception as e:
             return False
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_process())
-    finally:
-        loop.close() 
\ No newline at end of file
+    return run_async(_process())
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Status tracking for AI workflow stages in the ai_tasks table.
+
+Every stage moves Pending -> Running -> Completed/Failed on its (contract_id, version_id, type)
+row. Rows are upserted, so retries update the same row instead of inserting duplicates.
+"""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, List
+import asyncio
+import time
+import logging
+from server.app.external_services.service_registry import services
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _upsert_task(contract_id: str, version_id: str, task_type: str, data: dict) -> None:
+    services.supabase.table("ai_tasks").upsert({
+        "contract_id": contract_id,
+        "version_id": version_id,
+        "type": task_type,
+        "updated_at": _now(),
+        **data
+    }, on_conflict="contract_id,version_id,type").execute()
+
+def mark_pending(contract_id: str, version_id: str, task_types: List[str]) -> None:
+    """
+    Records the stages of a newly started workflow as Pending.
+    """
+    now = _now()
+    services.supabase.table("ai_tasks").upsert([
+        {
+            "contract_id": contract_id,
+            "version_id": version_id,
+            "type": task_type,
+            "status": "Pending",
+            "result": None,
+            "started_at": None,
+            "finished_at": None,
+            "duration_ms": None,
+            "error": None,
+            "updated_at": now
+        }
+        for task_type in task_types
+    ], on_conflict="contract_id,version_id,type").execute()
+
+class StageRun:
+    """Handle for a running stage; set result before leaving the tracked block."""
+    def __init__(self):
+        self.result: Any = None
+
+@asynccontextmanager
+async def track_stage(contract_id: str, version_id: str, task_type: str) -> AsyncIterator[StageRun]:
+    """
+    Marks a stage Running, then Completed with stage.result and its duration, or Failed
+    with the error if the block raises. The exception is re-raised to the caller.
+    The upserts run in a thread so they don't stall the other tasks on the worker loop.
+    """
+    started = time.monotonic()
+    await asyncio.to_thread(_upsert_task, contract_id, version_id, task_type, {
+        "status": "Running",
+        "started_at": _now(),
+        "finished_at": None,
+        "duration_ms": None,
+        "error": None
+    })
+    stage = StageRun()
+    try:
+        yield stage
+    except Exception as e:
+        duration_ms = int((time.monotonic() - started) * 1000)
+        logger.error(f"{task_type} failed for version {version_id} after {duration_ms} ms: {e}")
+        try:
+            await asyncio.to_thread(_upsert_task, contract_id, version_id, task_type, {
+                "status": "Failed",
+                "finished_at": _now(),
+                "duration_ms": duration_ms,
+                "error": str(e)
+            })
+        except Exception as db_exc:
+            logger.error(f"Failed to record {task_type} failure for version {version_id}: {db_exc}")
+        raise
+    duration_ms = int((time.monotonic() - started) * 1000)
+    await asyncio.to_thread(_upsert_task, contract_id, version_id, task_type, {
+        "status": "Completed",
+        "result": stage.result,
+        "finished_at": _now(),
+        "duration_ms": duration_ms
+    })
+    logger.info(f"{task_type} completed for version {version_id} in {duration_ms} ms")
+
+def get_stage_timings(version_id: str) -> List[dict]:
+    """
+    Returns type/status/duration of every tracked stage of a version.
+    """
+    response = services.supabase.table("ai_tasks").select(
+        "type, status, started_at, finished_at, duration_ms, error"
+    ).eq("version_id", version_id).execute()
+    return response.data or []
@@ -0,0 +1,98 @@
+"""
+Per-version AI workflow built on Celery canvas.
+
+    ingest_contract_version  ->  group(embeddings, clauses + risks[, diff])  ->  version_workflow_completed
+
+Text extraction runs once, the independent AI stages then run in parallel off the stored
+pages, and the chord callback fires when all of them have finished. Each stage records its
+Pending/Running/Completed/Failed transitions and duration in ai_tasks.
+"""
+from typing import Dict, List, Optional
+from celery import chain, chord, group
+from celery.result import AsyncResult
+import logging
+from server.app.tasks.celery_app import app, queue_for, DEFAULT_LANE
+from server.app.tasks.ingestion_task import ingest_contract_version
+from server.app.tasks.clause_extraction_task import extract_clauses_from_contract
+from server.app.tasks.risk_extraction_task import extract_risks_from_contract
+from server.app.tasks.contract_analysis_task import analyze_contract
+from server.app.external_services.contract_analyzer import AI_ANALYSIS_MODE
+from server.app.tasks.diff_extraction_task import extract_diff_from_contract
+from server.app.tasks.embedding_task import generate_embeddings_for_contract
+from server.app.tasks.task_status import mark_pending, get_stage_timings
+from server.app.core.page_store import delete_pages
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+@app.task(name='version_workflow_completed')
+def version_workflow_completed(stage_results: List[bool], contract_id: str, version_id: str) -> Dict:
+    """
+    Chord callback: releases the version's stored pages and logs where the wall-clock
+    time of the version's workflow went.
+    """
+    delete_pages(version_id)
+    timings = get_stage_timings(version_id)
+    failed = [t["type"] for t in timings if t["status"] == "Failed"]
+    summary = ", ".join(f"{t['type']}={t['duration_ms']}ms" for t in timings if t.get("duration_ms") is not None)
+    logger.info(f"AI workflow finished for contract {contract_id}, version {version_id}: {summary}")
+    if failed:
+        logger.error(f"AI workflow stages failed for version {version_id}: {failed}")
+    return {
+        "contract_id": contract_id,
+        "version_id": version_id,
+        "succeeded": all(stage_results),
+        "stages": timings
+    }
+
+def _on_lane(signature, lane: str):
+    return signature.set(queue=queue_for(signature.task, lane))
+
+def build_version_workflow(
+    contract_id: str,
+    version_id: str,
+    file_url: str,
+    prev_version_id: Optional[str] = None,
+    prev_file_url: Optional[str] = None,
+    lane: str = DEFAULT_LANE
+):
+    """
+    Returns the canvas for a version's AI workflow and the ai_tasks types it tracks.
+    Every task of the workflow is routed to its stage queue on the given lane.
+    """
+    stages = [generate_embeddings_for_contract.si(contract_id, version_id, file_url, prev_version_id=prev_version_id)]
+    if AI_ANALYSIS_MODE == "fused":
+        # One task writes both ClauseExtraction and RiskAssessment
+        stages.append(analyze_contract.si(contract_id, version_id, file_url))
+    else:
+        stages.append(extract_clauses_from_contract.si(contract_id, version_id, file_url))
+        stages.append(extract_risks_from_contract.si(contract_id, version_id, file_url))
+    task_types = ["TextExtraction", "Embedding", "ClauseExtraction", "RiskAssessment"]
+    if prev_version_id and prev_file_url:
+        stages.append(extract_diff_from_contract.si(
+            contract_id, version_id, prev_file_url, file_url, prev_version_id=prev_version_id
+        ))
+        task_types.append("Diff")
+    workflow = chain(
+        _on_lane(ingest_contract_version.si(contract_id, version_id, file_url), lane),
+        chord(
+            group([_on_lane(stage, lane) for stage in stages]),
+            _on_lane(version_workflow_completed.s(contract_id, version_id), lane)
+        )
+    )
+    return workflow, task_types
+
+def start_version_workflow(
+    contract_id: str,
+    version_id: str,
+    file_url: str,
+    prev_version_id: Optional[str] = None,
+    prev_file_url: Optional[str] = None,
+    lane: str = DEFAULT_LANE
+) -> AsyncResult:
+    """
+    Marks every stage Pending and enqueues the version's AI workflow on the given lane.
+    """
+    workflow, task_types = build_version_workflow(contract_id, version_id, file_url, prev_version_id, prev_file_url, lane)
+    mark_pending(contract_id, version_id, task_types)
+    return workflow.apply_async()
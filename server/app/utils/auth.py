@@ -21,4 +21,16 @@ def verify_jwt(credentials: HTTPAuthorizationCredentials = Depends(security)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token. Please log in again.",
-        ) 
\ No newline at end of file
+        )
+
+# Role in the token's app_metadata (only settable with the service key) that grants admin endpoints
+ADMIN_ROLE = os.environ.get("ADMIN_ROLE", "admin")
+
+def require_admin(user: dict = Depends(verify_jwt)):
+    app_metadata = user.get("app_metadata") or {}
+    if app_metadata.get("role") != ADMIN_ROLE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator access required.",
+        )
+    return user
@@ -0,0 +1,47 @@
+"""
+Per-request contract access context shared by the contract endpoints.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from uuid import UUID
+from fastapi import Depends, HTTPException
+from server.app.crud.contracts import load_contract_access
+from server.app.utils.auth import verify_jwt
+
+@dataclass(frozen=True)
+class ContractAccess:
+    contract_id: str
+    user_id: str
+    contract: Dict[str, Any]
+    role: Optional[str]  # CM/AS/CO, or None if the caller is not a participant
+
+    @property
+    def created_by(self) -> str:
+        return self.contract["created_by"]
+
+    @property
+    def is_manager(self) -> bool:
+        # The Contract Manager is the contract's creator
+        return self.created_by == self.user_id
+
+    def require_participant(self) -> None:
+        if self.role is None:
+            raise HTTPException(status_code=403, detail="You don't have access to this contract")
+
+    def require_manager(self, detail: str) -> None:
+        if not self.is_manager:
+            raise HTTPException(status_code=403, detail=detail)
+
+async def get_contract_access(id: UUID, user: dict = Depends(verify_jwt)) -> ContractAccess:
+    """
+    Loads the contract and the caller's membership once per request (through the
+    short-TTL access cache). Raises 403 if the caller is neither a participant nor the
+    creator, before revealing with a 404 whether the contract exists at all.
+    The cached contract row can be up to ACCESS_CACHE_TTL_SECONDS old.
+    """
+    contract, role = await load_contract_access(str(id), user["sub"])
+    if role is None and (contract is None or contract["created_by"] != user["sub"]):
+        raise HTTPException(status_code=403, detail="You don't have access to this contract")
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found.")
+    return ContractAccess(contract_id=str(id), user_id=user["sub"], contract=contract, role=role)
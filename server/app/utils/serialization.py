@@ -1,5 +1,6 @@
 import datetime
-from typing import Any
+from typing import Any, Dict, List
+
 
 def serialize_dates(obj: Any) -> Any:
     if isinstance(obj, dict):
@@ -9,4 +10,31 @@ def serialize_dates(obj: Any) -> Any:
     elif isinstance(obj, (datetime.date, datetime.datetime)):
         return obj.isoformat()
     else:
-        return obj 
\ No newline at end of file
+        return obj
+
+
+def _field_tree(paths: List[str]) -> Dict[str, Any]:
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        for part in path.split("."):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def _project(obj: Any, tree: Dict[str, Any]) -> Any:
+    if not tree:
+        return obj
+    if isinstance(obj, list):
+        return [_project(item, tree) for item in obj]
+    if isinstance(obj, dict):
+        return {k: _project(obj[k], subtree) for k, subtree in tree.items() if k in obj}
+    return obj
+
+
+def project_fields(obj: Any, paths: List[str]) -> Any:
+    """
+    Keeps only the dotted field paths of obj, e.g. ["clauses.type", "clauses.page"].
+    Lists are traversed transparently; an empty path list keeps everything.
+    """
+    return _project(obj, _field_tree(paths))